@@ -1,11 +1,25 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import random
 import time
-import textwrap  # ✅ 关键修复：添加 textwrap 引用
 from datetime import datetime, timedelta
 
+from gua.archive import Archive, archive_root
+from gua.backtest import DEFAULT_LOOKBACK, backtest_archived, backtest_many, warmup_start
+from gua.batch import WATCHLIST, fetch_many, market_reading, multi_timeframe_reading, reading_window, run_watchlist
+from gua.cache import ReadingCache
+from gua.casting import CAST_DELAY, cast, cast_stats, make_rng
+from gua.core import generate_ai_reading
+from gua.hexagrams import HEXAGRAMS, line_codes
+from gua.live import INTERVALS, REFRESH_SECONDS, LiveFeed
+from gua.metrics import METRICS, configure_logging, failed_stage, span, trace, write_prometheus
+from gua.occurrence import HISTORY_YEARS, OccurrenceIndex, history_start
+from gua.render import (
+    ben_card_html, daily_analysis_md, daily_card_html, market_analysis_md, timeframe_card_html, zhi_card_html,
+)
+from gua.render import cache_stats as render_cache_stats
+from gua.store import BarStore
+from gua.universe import SEQUENCE_DAYS, UNIVERSES, scan_universe, universe_symbols
+
 # --- 1. 页面配置 ---
 st.set_page_config(
     page_title="能源·周易量化",
@@ -67,6 +81,19 @@ st.markdown("""
         margin-bottom: 20px;
     }
     
+    /* 起卦结果的摇卦动画 (纯前端，不占用服务端线程) */
+    .cast-reveal {
+        animation: cast-reveal 1.5s ease-out both;
+    }
+    @keyframes cast-reveal {
+        0%   { opacity: 0; transform: rotate(0deg); }
+        20%  { opacity: 0.2; transform: rotate(-3deg); }
+        40%  { opacity: 0.4; transform: rotate(3deg); }
+        60%  { opacity: 0.6; transform: rotate(-2deg); }
+        80%  { opacity: 0.8; transform: rotate(1deg); }
+        100% { opacity: 1; transform: rotate(0deg); }
+    }
+
     /* 隐藏干扰元素 */
     #MainMenu {visibility: hidden;}
     footer {visibility: hidden;}
@@ -74,162 +101,79 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 3. 核心数据字典 ---
-HEXAGRAMS = {
-    "1,1,1,1,1,1": {"name": "乾", "pinyin": "qián", "judgment": "元亨利贞。", "interp": "【大象】天行健，君子以自强不息。<br>【量化】多头强势，动能充沛，如飞龙在天。<br>【策略】顺势做多，但需警惕高位滞涨。<br>【生活】运势极佳，适合大展宏图，忌骄傲。", "outlook": "bullish"},
-    "0,0,0,0,0,0": {"name": "坤", "pinyin": "kūn", "judgment": "元亨，利牝马之贞。", "interp": "【大象】地势坤，君子以厚德载物。<br>【量化】空头主导或底部盘整，波动率低。<br>【策略】不宜追高，适合定投或空仓观望。<br>【生活】包容忍耐，以静制动。", "outlook": "bearish"},
-    "1,0,0,0,1,0": {"name": "屯", "pinyin": "zhūn", "judgment": "元亨利贞。", "interp": "【大象】云雷屯。<br>【量化】筑底阶段，震荡剧烈，方向未明。<br>【策略】建仓需谨慎，控制仓位。<br>【生活】万事开头难，积蓄力量。", "outlook": "neutral"},
-    "0,1,0,0,0,1": {"name": "蒙", "pinyin": "méng", "judgment": "亨。", "interp": "【大象】山下出泉，蒙。<br>【量化】信息混沌，趋势不明，迷雾重重。<br>【策略】多看少动，等待信号。<br>【生活】局势不明朗，建议多咨询专家。", "outlook": "neutral"},
-    "1,1,1,0,1,0": {"name": "需", "pinyin": "xū", "judgment": "有孚，光亨。", "interp": "【大象】云上于天，需。<br>【量化】上涨趋势中的回调，需求在积蓄。<br>【策略】逢低吸纳，持仓待涨。<br>【生活】时机未到，耐心等待。", "outlook": "bullish"},
-    "0,1,0,1,1,1": {"name": "讼", "pinyin": "sòng", "judgment": "有孚，窒惕。", "interp": "【大象】天与水违，讼。<br>【量化】多空分歧巨大，成交量放大但滞涨。<br>【策略】风险较高，建议减仓。<br>【生活】易生口角，以和为贵。", "outlook": "neutral"},
-    "0,1,0,0,0,0": {"name": "师", "pinyin": "shī", "judgment": "贞，丈人吉。", "interp": "【大象】地中有水，师。<br>【量化】空头排列，趋势性下跌，力量集中。<br>【策略】顺势做空，严守纪律。<br>【生活】需要严明的纪律和领导。", "outlook": "bearish"},
-    "0,0,0,0,1,0": {"name": "比", "pinyin": "bǐ", "judgment": "吉。", "interp": "【大象】地上有水，比。<br>【量化】板块轮动良好，市场情绪和谐。<br>【策略】跟随龙头，寻找补涨机会。<br>【生活】人际关系和谐，有贵人相助。", "outlook": "neutral"},
-    "1,1,1,0,1,1": {"name": "小畜", "pinyin": "xiǎo chù", "judgment": "亨。密云不雨。", "interp": "【大象】风行天上，小畜。<br>【量化】上涨遇阻，窄幅震荡，蓄势待发。<br>【策略】高抛低吸，短期盘整。<br>【生活】积蓄力量，不可急于求成。", "outlook": "bullish"},
-    "1,1,0,1,1,1": {"name": "履", "pinyin": "lǚ", "judgment": "履虎尾。", "interp": "【大象】上天下泽，履。<br>【量化】高位震荡，风险积聚，如履薄冰。<br>【策略】设置止损，步步为营。<br>【生活】有惊无险，但须小心。", "outlook": "neutral"},
-    "1,1,1,0,0,0": {"name": "泰", "pinyin": "tài", "judgment": "小往大来。", "interp": "【大象】天地交，泰。<br>【量化】多头市场，量价齐升，极为顺畅。<br>【策略】积极做多，享受泡沫。<br>【生活】三阳开泰，非常吉利。", "outlook": "bullish"},
-    "0,0,0,1,1,1": {"name": "否", "pinyin": "pǐ", "judgment": "否之匪人。", "interp": "【大象】天地不交，否。<br>【量化】流动性枯竭，阴跌不止。<br>【策略】清仓离场，现金为王。<br>【生活】闭塞不通，宜退守。", "outlook": "bearish"},
-    "1,0,1,1,1,1": {"name": "同人", "pinyin": "tóng rén", "judgment": "同人于野。", "interp": "【大象】天与火，同人。<br>【量化】市场共识形成，普涨行情。<br>【策略】重仓出击，跟随主流。<br>【生活】志同道合，利于团队。", "outlook": "bullish"},
-    "1,1,1,1,0,1": {"name": "大有", "pinyin": "dà yǒu", "judgment": "元亨。", "interp": "【大象】火在天上，大有。<br>【量化】牛市主升浪，收获颇丰。<br>【策略】持有核心资产，防止获利回吐。<br>【生活】运势昌隆，忌满招损。", "outlook": "bullish"},
-    "0,0,1,0,0,0": {"name": "谦", "pinyin": "qiān", "judgment": "君子有终。", "interp": "【大象】地中有山，谦。<br>【量化】价值低估，底部夯实。<br>【策略】逢低布局，长线持有。<br>【生活】谦虚受益，低调行事。", "outlook": "neutral"},
-    "0,0,0,1,0,0": {"name": "豫", "pinyin": "yù", "judgment": "利建侯行师。", "interp": "【大象】雷出地奋，豫。<br>【量化】突破盘整，放量上行。<br>【策略】积极参与，顺势加仓。<br>【生活】安乐愉悦，利于行动。", "outlook": "neutral"},
-    "1,0,0,1,1,0": {"name": "随", "pinyin": "suí", "judgment": "元亨利贞。", "interp": "【大象】泽中有雷，随。<br>【量化】趋势跟随，无明显主见。<br>【策略】右侧交易，不摸顶底。<br>【生活】随遇而安，随时变通。", "outlook": "neutral"},
-    "0,1,1,0,0,1": {"name": "蛊", "pinyin": "gǔ", "judgment": "元亨。", "interp": "【大象】山下有风，蛊。<br>【量化】利空出尽，估值修复。<br>【策略】关注困境反转股。<br>【生活】整顿积弊，改革良机。", "outlook": "neutral"},
-    "1,1,0,0,0,0": {"name": "临", "pinyin": "lín", "judgment": "元亨利贞。", "interp": "【大象】泽上有地，临。<br>【量化】多头逼空，阳线连发。<br>【策略】果断进场，持有待涨。<br>【生活】居高临下，运势增长。", "outlook": "bullish"},
-    "0,0,0,0,1,1": {"name": "观", "pinyin": "guān", "judgment": "盥而不荐。", "interp": "【大象】风行地上，观。<br>【量化】高位滞涨，缩量整理。<br>【策略】多看少动，观察盘面。<br>【生活】冷静观察，静观其变。", "outlook": "neutral"},
-    "1,0,0,1,0,1": {"name": "噬嗑", "pinyin": "shì hé", "judgment": "利用狱。", "interp": "【大象】雷电，噬嗑。<br>【量化】关键阻力位，多空激烈博弈。<br>【策略】需要放量突破，否则回落。<br>【生活】遇到阻碍，需果断解决。", "outlook": "neutral"},
-    "1,0,1,0,0,1": {"name": "贲", "pinyin": "bì", "judgment": "小利有攸往。", "interp": "【大象】山下有火，贲。<br>【量化】题材炒作，概念火热但无支撑。<br>【策略】短线快进快出。<br>【生活】表面繁荣，需看清本质。", "outlook": "neutral"},
-    "0,0,0,0,0,1": {"name": "剥", "pinyin": "bō", "judgment": "不利有攸往。", "interp": "【大象】山附于地，剥。<br>【量化】高位崩塌，获利盘出逃。<br>【策略】止损离场，不可抄底。<br>【生活】基础不稳，防范损失。", "outlook": "bearish"},
-    "1,0,0,0,0,0": {"name": "复", "pinyin": "fù", "judgment": "亨。", "interp": "【大象】雷在地中，复。<br>【量化】超跌反弹，V型反转。<br>【策略】左侧建仓，长线布局。<br>【生活】一阳来复，否极泰来。", "outlook": "bullish"},
-    "1,0,0,1,1,1": {"name": "无妄", "pinyin": "wú wàng", "judgment": "元亨利贞。", "interp": "【大象】天下雷行，物与无妄。<br>【量化】回归价值，去除泡沫。<br>【策略】不追题材，关注基本面。<br>【生活】真实无妄，不可投机。", "outlook": "neutral"},
-    "1,1,1,0,0,1": {"name": "大畜", "pinyin": "dà chù", "judgment": "利贞。", "interp": "【大象】天在山中，大畜。<br>【量化】横盘吸筹，主力建仓。<br>【策略】耐心持股，等待主升浪。<br>【生活】积蓄巨大，厚积薄发。", "outlook": "neutral"},
-    "1,0,0,0,0,1": {"name": "颐", "pinyin": "yí", "judgment": "贞吉。", "interp": "【大象】山下有雷，颐。<br>【量化】缩量整固，上下两难。<br>【策略】高抛低吸，或休息观望。<br>【生活】颐养身心，此时宜静。", "outlook": "neutral"},
-    "0,1,1,1,1,0": {"name": "大过", "pinyin": "dà guò", "judgment": "栋桡。", "interp": "【大象】泽灭木，大过。<br>【量化】严重超买，乖离率过大。<br>【策略】风险极大，建议清仓。<br>【生活】压力过大，需释放压力。", "outlook": "neutral"},
-    "0,1,0,0,1,0": {"name": "坎", "pinyin": "kǎn", "judgment": "习坎。", "interp": "【大象】水流而不盈，习坎。<br>【量化】破位下行，深不见底。<br>【策略】现金为王，切勿接飞刀。<br>【生活】重重险陷，务必保守。", "outlook": "bearish"},
-    "1,0,1,1,0,1": {"name": "离", "pinyin": "lí", "judgment": "利贞。", "interp": "【大象】明两作，离。<br>【量化】加速赶顶，情绪狂热。<br>【策略】短线博弈，快进快出。<br>【生活】如日中天，但来去匆匆。", "outlook": "bullish"},
-    "0,0,1,1,1,0": {"name": "咸", "pinyin": "xián", "judgment": "亨。", "interp": "【大象】山上有泽，咸。<br>【量化】消息刺激，脉冲式行情。<br>【策略】关注消息面，灵活操作。<br>【生活】感应沟通，利于社交。", "outlook": "neutral"},
-    "0,1,1,1,0,0": {"name": "恒", "pinyin": "héng", "judgment": "亨。", "interp": "【大象】雷风，恒。<br>【量化】趋势稳定，慢牛或阴跌。<br>【策略】顺着当前趋势操作。<br>【生活】恒久持续，保持现状。", "outlook": "neutral"},
-    "0,0,1,1,1,1": {"name": "遁", "pinyin": "dùn", "judgment": "亨，小利贞。", "interp": "【大象】天下有山，遁。<br>【量化】诱多出货，重心下移。<br>【策略】逢反弹减仓，避险为主。<br>【生活】退避隐遁，不宜争锋。", "outlook": "bearish"},
-    "1,1,1,1,0,0": {"name": "大壮", "pinyin": "dà zhuàng", "judgment": "利贞。", "interp": "【大象】雷在天上，大壮。<br>【量化】放量突破，强势上攻。<br>【策略】重仓持有，防冲高回落。<br>【生活】声势壮大，适合进攻。", "outlook": "bullish"},
-    "0,0,0,1,0,1": {"name": "晋", "pinyin": "jìn", "judgment": "康侯用锡马。", "interp": "【大象】明出地上，晋。<br>【量化】稳步推升，进二退一。<br>【策略】积极进取，持股待涨。<br>【生活】旭日东升，步步高升。", "outlook": "bullish"},
-    "1,0,1,0,0,0": {"name": "明夷", "pinyin": "míng yí", "judgment": "利艰贞。", "interp": "【大象】明入地中，明夷。<br>【量化】黑天鹅事件，大幅跳水。<br>【策略】空仓避险，不要抱有幻想。<br>【生活】前景黯淡，需忍耐。", "outlook": "bearish"},
-    "1,0,1,0,1,1": {"name": "家人", "pinyin": "jiā rén", "judgment": "利女贞。", "interp": "【大象】风自火出，家人。<br>【量化】防御性板块走强，结构性行情。<br>【策略】关注消费、公用事业。<br>【生活】相亲相爱，基础稳固。", "outlook": "neutral"},
-    "1,1,0,1,0,1": {"name": "睽", "pinyin": "kuí", "judgment": "小事吉。", "interp": "【大象】上火下泽，睽。<br>【量化】板块分化，赚钱效应差。<br>【策略】多空分歧大，不宜重仓。<br>【生活】意见不合，小事可为。", "outlook": "neutral"},
-    "0,0,1,0,1,0": {"name": "蹇", "pinyin": "jiǎn", "judgment": "利西南。", "interp": "【大象】山上有水，蹇。<br>【量化】上有压力下有支撑，僵持不下。<br>【策略】不宜硬闯，等待变盘。<br>【生活】前有险阻，最好求援。", "outlook": "bearish"},
-    "0,1,0,1,0,0": {"name": "解", "pinyin": "jiě", "judgment": "利西南。", "interp": "【大象】雷雨作，解。<br>【量化】利空消化，止跌回升。<br>【策略】布局超跌反弹。<br>【生活】冰消瓦解，困难消除。", "outlook": "bullish"},
-    "1,1,0,0,0,1": {"name": "损", "pinyin": "sǔn", "judgment": "有孚，元吉。", "interp": "【大象】山下有泽，损。<br>【量化】缩量阴跌，市值缩水。<br>【策略】止损换股，先失后得。<br>【生活】减损获益，需投入成本。", "outlook": "bearish"},
-    "1,0,0,0,1,1": {"name": "益", "pinyin": "yì", "judgment": "利有攸往。", "interp": "【大象】风雷，益。<br>【量化】政策利好，资金流入。<br>【策略】积极参与，大展拳脚。<br>【生活】损上益下，环境宽松。", "outlook": "bullish"},
-    "1,1,1,1,1,0": {"name": "夬", "pinyin": "guài", "judgment": "扬于王庭。", "interp": "【大象】泽上于天，夬。<br>【量化】冲关时刻，多头总攻。<br>【策略】必须果断跟进，切勿犹豫。<br>【生活】决断突破，必须果断。", "outlook": "bullish"},
-    "0,1,1,1,1,1": {"name": "姤", "pinyin": "gòu", "judgment": "女壮，勿用取女。", "interp": "【大象】天下有风，姤。<br>【量化】冲高回落，头部迹象。<br>【策略】虽然上涨但需减仓。<br>【生活】不期而遇，防微杜渐。", "outlook": "bearish"},
-    "0,0,0,0,1,1": {"name": "萃", "pinyin": "cuì", "judgment": "亨。", "interp": "【大象】泽上于地，萃。<br>【量化】资金抱团，龙头效应。<br>【策略】加入核心资产，享受泡沫。<br>【生活】聚集荟萃，人气高涨。", "outlook": "bullish"},
-    "0,1,1,0,0,0": {"name": "升", "pinyin": "shēng", "judgment": "元亨。", "interp": "【大象】地中生木，升。<br>【量化】稳步上涨，均线多头。<br>【策略】坚定持仓，不轻易下车。<br>【生活】积小成大，步步高升。", "outlook": "bullish"},
-    "0,1,0,1,1,0": {"name": "困", "pinyin": "kùn", "judgment": "亨，贞，大人吉。", "interp": "【大象】泽无水，困。<br>【量化】成交低迷，无人问津。<br>【策略】不要轻易抄底，效率极低。<br>【生活】困顿穷乏，需坚守。", "outlook": "neutral"},
-    "0,1,1,0,1,0": {"name": "井", "pinyin": "jǐng", "judgment": "改邑不改井。", "interp": "【大象】木上有水，井。<br>【量化】织布机行情，原地踏步。<br>【策略】适合高股息策略，做定投。<br>【生活】价值仍在，适合定投。", "outlook": "neutral"},
-    "1,0,1,1,1,0": {"name": "革", "pinyin": "gé", "judgment": "元亨利贞。", "interp": "【大象】泽中有火，革。<br>【量化】风格切换，新老交替。<br>【策略】调仓换股，跟随新热点。<br>【生活】除旧布新，面临变革。", "outlook": "neutral"},
-    "0,1,1,1,0,1": {"name": "鼎", "pinyin": "dǐng", "judgment": "元吉。", "interp": "【大象】木上有火，鼎。<br>【量化】新周期确立，格局稳定。<br>【策略】布局蓝筹，长线看好。<br>【生活】稳重图新，新的繁荣。", "outlook": "bullish"},
-    "1,0,0,1,0,0": {"name": "震", "pinyin": "zhèn", "judgment": "亨。", "interp": "【大象】洊雷，震。<br>【量化】消息面利空，盘中急跌。<br>【策略】或是黄金坑，注意情绪修复。<br>【生活】突发事件，有惊无险。", "outlook": "neutral"},
-    "0,0,1,0,0,1": {"name": "艮", "pinyin": "gèn", "judgment": "艮其背。", "interp": "【大象】兼山，艮。<br>【量化】上涨乏力，多重顶。<br>【策略】止盈离场，休息观望。<br>【生活】动静适时，止步不前。", "outlook": "neutral"},
-    "0,0,1,0,1,1": {"name": "渐", "pinyin": "jiàn", "judgment": "女归吉。", "interp": "【大象】山上有木，渐。<br>【量化】碎步上行，慢牛行情。<br>【策略】保持耐心，不要被震荡洗出局。<br>【生活】循序渐进，终成大器。", "outlook": "neutral"},
-    "1,1,0,1,0,0": {"name": "归妹", "pinyin": "guī mèi", "judgment": "征凶。", "interp": "【大象】泽上有雷，归妹。<br>【量化】走势怪异，诱多陷阱。<br>【策略】如果不看好，坚决不参与。<br>【生活】错位之象，易失误。", "outlook": "neutral"},
-    "1,0,1,1,0,0": {"name": "丰", "pinyin": "fēng", "judgment": "亨。", "interp": "【大象】雷电皆至，丰。<br>【量化】成交天量，情绪亢奋。<br>【策略】逐步止盈，落袋为安。<br>【生活】达到顶峰，盛极必衰。", "outlook": "bullish"},
-    "0,0,1,1,1,0": {"name": "旅", "pinyin": "lǚ", "judgment": "小亨。", "interp": "【大象】山上有火，旅。<br>【量化】游资主导，一日游行情。<br>【策略】打板或超短线，快进快出。<br>【生活】漂泊不定，不宜久留。", "outlook": "neutral"},
-    "0,1,1,0,1,1": {"name": "巽", "pinyin": "xùn", "judgment": "小亨。", "interp": "【大象】随风，巽。<br>【量化】市场形成一致预期，无脑跟随。<br>【策略】不要逆势操作，风往哪吹往哪倒。<br>【生活】顺风而行，顺从时势。", "outlook": "neutral"},
-    "1,1,0,1,1,0": {"name": "兑", "pinyin": "duì", "judgment": "亨。", "interp": "【大象】丽泽，兑。<br>【量化】交易活跃，换手率高。<br>【策略】积极参与热点，但防高位被套。<br>【生活】喜悦沟通，防口舌是非。", "outlook": "bullish"},
-    "0,1,0,0,1,1": {"name": "涣", "pinyin": "huàn", "judgment": "亨。", "interp": "【大象】风行水上，涣。<br>【量化】筹码松动，主力撤退。<br>【策略】该跑就跑，不要留恋。<br>【生活】离散之象，人心涣散。", "outlook": "neutral"},
-    "1,1,0,0,1,0": {"name": "节", "pinyin": "jié", "judgment": "亨。", "interp": "【大象】泽上有水，节。<br>【量化】箱体震荡，上有顶下有底。<br>【策略】高抛低吸，懂得止盈。<br>【生活】节制适度，量力而行。", "outlook": "neutral"},
-    "1,1,0,0,1,1": {"name": "中孚", "pinyin": "zhōng fú", "judgment": "豚鱼吉。", "interp": "【大象】泽上有风，中孚。<br>【量化】技术指标有效，走势规范。<br>【策略】按技术图形操作，相信信号。<br>【生活】诚信感通，脚下有路。", "outlook": "neutral"},
-    "0,0,1,1,0,0": {"name": "小过", "pinyin": "xiǎo guò", "judgment": "亨，利贞。", "interp": "【大象】山上有雷，小过。<br>【量化】小幅波动，大趋势不明。<br>【策略】小仓位试错，不要重仓博弈。<br>【生活】小有过度，宜守。", "outlook": "neutral"},
-    "1,0,1,0,1,0": {"name": "既济", "pinyin": "jì jì", "judgment": "亨，小利贞。", "interp": "【大象】水在火上，既济。<br>【量化】完美收官，利好兑现。<br>【策略】获利了结，见好就收。<br>【生活】大功告成，防盛极而衰。", "outlook": "neutral"},
-    "0,1,0,1,0,1": {"name": "未济", "pinyin": "wèi jì", "judgment": "亨。", "interp": "【大象】火在水上，未济。<br>【量化】行情未完，充满变数。<br>【策略】寻找新的增长点，在此博弈。<br>【生活】未完成，充满希望。", "outlook": "neutral"}
-}
+# HEXAGRAMS[code]：64 卦整数编码稠密表 (gua/hexagrams.py)，导入时校验完整性
 
-# --- 4. 辅助函数: 生成卦象HTML (压扁成单行) ---
-def get_hexagram_html(key_str):
-    lines = key_str.split(",") 
-    html_lines = []
-    # 视觉显示 Top->Bottom (上->初)，所以需要 reversed
-    for val in reversed(lines):
-        if val == "1":
-            html_lines.append('<div class="line-yang"></div>')
-        else:
-            html_lines.append('<div class="line-yin"><div class="line-yin-part"></div><div class="line-yin-part"></div></div>')
-    
-    # 关键：压缩成一行
-    return f'<div class="hex-container">{"".join(html_lines)}</div>'
+# --- 4. 辅助函数: 卦象/卡片 HTML ---
+# 64 卦线条与本/之卦卡片由 gua/render.py 预生成并缓存，这里只拼接每次请求的数据
 
 # --- 5. 计算逻辑 ---
-def calculate_hexagram(df):
-    # 确保是 Series, 避免 MultiIndex 导致的问题
-    try:
-        closes = df['Close'].values.flatten()
-        opens = df['Open'].values.flatten()
-    except:
-        closes = df['Close']
-        opens = df['Open']
-
-    changes = abs((closes - opens) / opens)
-    avg_change = changes.mean()
-    volatility_threshold = avg_change * 1.5
-
-    ben_lines = []
-    zhi_lines = []
-    details = []
-
-    # 取最后6天，保留自然顺序 (i=0 是最早日期 -> 初爻)
-    subset = df.tail(6)
-
-    for i in range(6):
-        row = subset.iloc[i]
-
-        # 强制标量化，防止 Series 歧义
-        c = float(row['Close'])
-        o = float(row['Open'])
-
-        is_up = c >= o
-        change_pct = abs((c - o) / o)
-        is_moving = change_pct > volatility_threshold
-
-        if is_up:
-            line_val = 9 if is_moving else 7
-        else:
-            line_val = 6 if is_moving else 8
-
-        ben_val = 1 if line_val in [7, 9] else 0
-        zhi_val = 0 if line_val == 9 else (1 if line_val == 6 else ben_val)
-
-        ben_lines.append(str(ben_val))
-        zhi_lines.append(str(zhi_val))
-
-        details.append({
-            "date": row.name.strftime('%Y-%m-%d'),
-            "close": c,
-            "change": (c - o) / o,
-            "type": line_val,
-            "position": i
-        })
-
-    return ",".join(ben_lines), ",".join(zhi_lines), details
-
-
-def generate_ai_reading(ben_info, zhi_info, has_change, question=None):
-    """基于卦辞与走势给出简易 AI 解签（无外部依赖）。"""
-    trend_hint = {
-        "bullish": "多头力量占优，顺势而为。",
-        "bearish": "空头压制，需谨慎防守。",
-        "neutral": "震荡为主，宜轻仓试探。"
-    }.get(ben_info.get("outlook"), "保持平衡，随时应变。")
-
-    change_hint = "局势稳定，保持节奏。" if not has_change else f"正在向『{zhi_info['name']}』之象转化，提前布局。"
-
-    question_part = f"关于『{question}』，" if question else ""
-
-    return textwrap.dedent(f"""
-    {question_part}当前处于『{ben_info['name']}』之象：{ben_info['judgment']} {trend_hint}
-    {change_hint} 参考之卦的启示：{zhi_info['interp'].replace('<br>', '').strip()}
-    """).strip()
+# calculate_hexagram / generate_ai_reading 位于 gua/core.py（无 Streamlit 依赖，批处理可直接导入）
+
+# --- 6. 数据层: 本地K线仓库 (进程内共享，跨会话复用) ---
+@st.cache_resource
+def get_bar_store():
+    store = BarStore()
+    METRICS.register_cache("bar_store", store.stats)
+    return store
+
+@st.cache_resource
+def get_occurrence_index(symbol):
+    index = OccurrenceIndex(symbol)
+    # 有同口径的归档 (python -m gua archive --lookback 40D) 时直接映射载入，之后只增量并入新K线
+    archive = Archive(archive_root(), lookback=index.lookback)
+    if archive.exists(symbol):
+        index.seed(archive.view(symbol, start=history_start(datetime.now())))
+    return index
+
+# 起卦结果跨会话共享：相同 (品种, 日期) 只取数/计算一次，并发请求合并等待
+@st.cache_resource
+def get_reading_cache():
+    cache = ReadingCache()
+    METRICS.register_cache("reading", cache.stats)
+    return cache
+
+# 指标：GUA_METRICS_LOG 输出 JSON 日志，GUA_METRICS_FILE 写 Prometheus 文本
+configure_logging()
+METRICS.register_cache("render", render_cache_stats)
 
-# --- 6. 界面布局 ---
+# 盘中实时：每个 (品种, 周期) 一个共享的增量读数
+@st.cache_resource
+def get_live_feed(symbol, interval):
+    return LiveFeed(symbol, interval, store=get_bar_store())
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def live_panel(symbol, interval):
+    # 定时只重跑本面板；卡片 HTML 走缓存，卦象变化时才提示
+    feed = get_live_feed(symbol, interval)
+    try:
+        feed.poll()
+    except Exception as e:
+        st.error(f"Data Error: {e}")
+        return
+    reading = feed.reading()
+    if reading is None:
+        st.warning("数据不足 (Data Insufficient)")
+        return
+
+    ben_code, zhi_code, line_details = reading
+    seen_key = f"live_version_{symbol}_{interval}"
+    if st.session_state.get(seen_key) not in (None, feed.version):
+        st.toast(f"卦象变化：{HEXAGRAMS[ben_code]['name']} → {HEXAGRAMS[zhi_code]['name']}")
+    st.session_state[seen_key] = feed.version
+
+    c1, c2 = st.columns(2)
+    c1.markdown(ben_card_html(ben_code), unsafe_allow_html=True)
+    c2.markdown(zhi_card_html(zhi_code, ben_code != zhi_code), unsafe_allow_html=True)
+    last = line_details[-1]
+    st.caption(f"{interval} · 最新K线 {last['date']} UTC · {last['close']:.2f} ({last['change']*100:.2f}%) · "
+               f"动爻阈值 {feed.hexagram.threshold*100:.2f}% · 每 {REFRESH_SECONDS}s 刷新")
+
+# --- 7. 界面布局 ---
 
 # TABS
-tab_market, tab_daily = st.tabs(["📈 市场量化 (Tech)", "🎲 趣味问卜 (国潮)"])
+tab_market, tab_daily, tab_backtest, tab_universe = st.tabs(
+    ["📈 市场量化 (Tech)", "🎲 趣味问卜 (国潮)", "📉 信号回测 (Backtest)", "🌐 横截面 (Universe)"]
+)
 
 # --- MARKET TAB ---
 with tab_market:
@@ -238,127 +182,181 @@ with tab_market:
     col1, col2 = st.columns([1, 1])
     with col1:
         symbol = st.selectbox("选择品种 (Asset)", 
-                     ["BZ=F", "NG=F", "TTF=F", "RB=F"], 
-                     format_func=lambda x: {
-                         "BZ=F": "🛢️ Brent Crude", 
-                         "NG=F": "🔥 Natural Gas",
-                         "TTF=F": "🇪🇺 Dutch TTF", 
-                         "RB=F": "⛽ RBOB Gasoline"
-                     }[x])
+                     list(WATCHLIST), 
+                     format_func=lambda x: WATCHLIST[x])
     with col2:
         date_val = st.date_input("基准日期 (Date)", datetime.now())
         
-    if st.button("🚀 启动量化模型 (RUN MODEL)", type="primary"):
-        with st.spinner("Connecting to Exchange..."):
+    b1, b2 = st.columns([1, 1])
+    run_model = b1.button("🚀 启动量化模型 (RUN MODEL)", type="primary", use_container_width=True)
+    run_all = b2.button("📋 全部品种 (RUN ALL)", use_container_width=True)
+
+    live_on = st.toggle("📡 盘中实时 (LIVE)", value=False)
+    if live_on:
+        live_interval = st.selectbox("K线周期 (Interval)", list(INTERVALS), index=1)
+        live_panel(symbol, live_interval)
+
+    if run_model:
+        run_started = time.perf_counter()
+        with st.spinner("Connecting to Exchange..."), trace() as run_spans:
             try:
-                end_date = pd.to_datetime(date_val)
-                start_date = end_date - timedelta(days=40)
-                
-                # yfinance download
-                df = yf.download(symbol, start=start_date, end=end_date + timedelta(days=1), progress=False)
-                
-                # 处理 MultiIndex 列名 (yfinance v0.2+)
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.get_level_values(0)
+                # 本地仓库只向 yfinance 补拉缺失的尾部，其余直接读盘
+                reading = get_reading_cache().get_or_compute(
+                    (symbol, date_val.isoformat()),
+                    lambda: market_reading(symbol, date_val, get_bar_store()),
+                )
 
-                if len(df) < 6:
+                if reading is None:
                     st.error("数据不足 (Data Insufficient)")
                 else:
-                    ben_key, zhi_key, line_details = calculate_hexagram(df)
-                    ben_info = HEXAGRAMS.get(ben_key)
-                    zhi_info = HEXAGRAMS.get(zhi_key)
+                    ben_code, zhi_code, line_details = reading["ben"], reading["zhi"], reading["details"]
+                    ben_info = HEXAGRAMS[ben_code]
+                    zhi_info = HEXAGRAMS[zhi_code]
+                    
+                    st.markdown("---")
+                    
+                    c1, c2 = st.columns(2)
                     
-                    if not ben_info:
-                         st.error(f"Hexagram Key Error: {ben_key}")
-                    else:
-                        st.markdown("---")
-                        
-                        c1, c2 = st.columns(2)
-                        
-                        # 使用 textwrap.dedent + replace 来确保 HTML 格式正确且无缩进
-                        
-                        # 1. 本卦卡片
-                        with c1:
-                            hex_html = get_hexagram_html(ben_key)
-                            ben_interp = ben_info['interp'].replace('\n', '')
-                            html_str = textwrap.dedent(f"""
-                                <div class="result-card">
-                                    <div style="color:#64748b; font-weight:bold; font-size:12px; margin-bottom:5px;">CURRENT PHASE</div>
-                                    {hex_html}
-                                    <div style="font-size:24px; font-weight:bold; margin-top:10px;">{ben_info['name']}</div>
-                                    <div style="font-size:14px; font-style:italic; color:#64748b;">{ben_info['judgment']}</div>
-                                    <hr style="margin:10px 0; border-top: 1px solid #e2e8f0;">
-                                    <div style="text-align:left; font-size:13px; line-height:1.6;">
-                                        {ben_interp}
-                                    </div>
-                                </div>
-                            """).strip()
-                            st.markdown(html_content := html_str, unsafe_allow_html=True)
+                    with span("render", symbol):
+                        # 1. 本卦卡片
+                        with c1:
+                            st.markdown(ben_card_html(ben_code), unsafe_allow_html=True)
 
                         # 2. 之卦卡片
-                        with c2:
-                            hex_html_zhi = get_hexagram_html(zhi_key)
-                            opacity = "1" if ben_key != zhi_key else "0.5"
-                            suffix = "(变卦)" if ben_key != zhi_key else "(无变动)"
-                            zhi_interp = zhi_info['interp'].replace('\n', '')
-                            html_str_zhi = textwrap.dedent(f"""
-                                <div class="result-card" style="opacity:{opacity};">
-                                    <div style="color:#64748b; font-weight:bold; font-size:12px; margin-bottom:5px;">PROJECTION</div>
-                                    {hex_html_zhi}
-                                    <div style="font-size:24px; font-weight:bold; margin-top:10px;">{zhi_info['name']} {suffix}</div>
-                                    <div style="font-size:14px; font-style:italic; color:#64748b;">{zhi_info['judgment']}</div>
-                                    <hr style="margin:10px 0; border-top: 1px solid #e2e8f0;">
-                                    <div style="text-align:left; font-size:13px; line-height:1.6;">
-                                        {zhi_interp}
-                                    </div>
-                                </div>
-                            """).strip()
-                            st.markdown(html_str_zhi, unsafe_allow_html=True)
+                        with c2:
+                            st.markdown(zhi_card_html(zhi_code, ben_code != zhi_code), unsafe_allow_html=True)
+
+                    # 多周期：同一条日线重采样出 日/周/月 读数，只多一次读盘
+                    st.markdown("### 🗓️ 多周期 (Multi-Timeframe)")
+                    timeframes = get_reading_cache().get_or_compute(
+                        (symbol, date_val.isoformat(), "timeframes"),
+                        lambda: multi_timeframe_reading(symbol, date_val, get_bar_store()),
+                    )
+                    for col, tf in zip(st.columns(len(timeframes)), timeframes.to_dict("records")):
+                        with col:
+                            if tf["error"]:
+                                st.warning(f"{tf['label']}: {tf['error']}")
+                            else:
+                                st.markdown(timeframe_card_html(tf["label"], int(tf["ben"]), int(tf["zhi"])),
+                                            unsafe_allow_html=True)
+
+                    # 历史同卦：倒排索引增量更新后查询（只看基准日期之前的出现）
+                    st.markdown("### 🔎 历史同卦 (History)")
+                    history = get_occurrence_index(symbol)
+                    end_excl = reading_window(date_val)[1]
+                    with span("history", symbol):
+                        history.update(get_bar_store().get_bars(symbol, history_start(end_excl), end_excl))
+                    reading_date = reading["date"]
+                    ben_stats = history.stats(ben_code, before=reading_date)
+                    pair_stats = history.stats(ben_code, zhi_code, before=reading_date)
+                    pair_label = f"{ben_info['name']}→{zhi_info['name']}" if ben_code != zhi_code else f"{ben_info['name']} (无变动)"
+                    st.markdown(
+                        f"- 本卦『{ben_info['name']}』近 {HISTORY_YEARS} 年出现 **{ben_stats['count']}** 次，"
+                        f"平均 5 日收益 {ben_stats['mean_5d']*100:.2f}%，上涨概率 {ben_stats['up_5d']*100:.0f}%<br>"
+                        f"- 『{pair_label}』出现 **{pair_stats['count']}** 次"
+                        + (f"，最近一次 {pair_stats['last']:%Y-%m-%d}" if pair_stats['last'] is not None else ""),
+                        unsafe_allow_html=True,
+                    )
+                    # 同一组本/之卦未出现过时，退回列出本卦的历次出现
+                    occurrences = history.query(ben_code, zhi_code if pair_stats['count'] else None,
+                                                before=reading_date, limit=10)
+                    if len(occurrences):
+                        history_rows = []
+                        for o in occurrences.to_dict("records"):
+                            history_rows.append({
+                                "Date": o['date'].strftime('%Y-%m-%d'),
+                                "卦": f"{o['ben']}→{o['zhi']}" if o['ben'] != o['zhi'] else o['ben'],
+                                "Close": f"{o['close']:.2f}",
+                                **{k.replace("fwd_", "+").upper(): ("" if pd.isna(o[k]) else f"{o[k]*100:.2f}%")
+                                   for k in o if k.startswith("fwd_")},
+                            })
+                        st.dataframe(pd.DataFrame(history_rows), use_container_width=True)
 
-                        # 3. K线表（初爻=最早，顺序向上）
-                        st.subheader("📊 K-Line Sequence")
-                        table_data = []
-                        pos_map = ["初爻 (Bottom)", "二爻", "三爻", "四爻", "五爻", "上爻 (Top)"]
+                    # 3. K线表（初爻=最早，顺序向上）
+                    st.subheader("📊 K-Line Sequence")
+                    table_data = []
+                    pos_map = ["初爻 (Bottom)", "二爻", "三爻", "四爻", "五爻", "上爻 (Top)"]
 
-                        for d in line_details:
-                            type_str = "阳 (7)"
-                            if d['type'] == 8: type_str = "阴 (8)"
-                            if d['type'] == 9: type_str = "老阳 (9) 🔴"
-                            if d['type'] == 6: type_str = "老阴 (6) 🔵"
+                    for d in line_details:
+                        type_str = "阳 (7)"
+                        if d['type'] == 8: type_str = "阴 (8)"
+                        if d['type'] == 9: type_str = "老阳 (9) 🔴"
+                        if d['type'] == 6: type_str = "老阴 (6) 🔵"
 
-                            table_data.append({
-                                "Date": d['date'],
-                                "Pos": pos_map[d['position']],
-                                "Close": f"{d['close']:.2f}",
-                                "Chg%": f"{d['change']*100:.2f}%",
-                                "Type": type_str
-                            })
+                        table_data.append({
+                            "Date": d['date'],
+                            "Pos": pos_map[d['position']],
+                            "Close": f"{d['close']:.2f}",
+                            "Chg%": f"{d['change']*100:.2f}%",
+                            "Type": type_str
+                        })
 
-                        st.dataframe(pd.DataFrame(table_data), use_container_width=True)
+                    st.dataframe(pd.DataFrame(table_data), use_container_width=True)
 
-                        # 4. 卦象展开 + AI 解签
-                        st.markdown("### 🧭 卦象展开")
-                        ordered_lines = sorted(line_details, key=lambda x: x['position'], reverse=True)
-                        timeline_md = "".join([
-                            f"- {pos_map[d['position']]}（{d['date']}）：{d['close']:.2f}，{d['change']*100:.2f}% -> {['阴','阳'][int(d['type'] in [7,9])]}<br>"
-                            for d in ordered_lines
-                        ])
-                        st.markdown(timeline_md, unsafe_allow_html=True)
+                    # 4. 卦象展开 + AI 解签
+                    st.markdown("### 🧭 卦象展开")
+                    ordered_lines = sorted(line_details, key=lambda x: x['position'], reverse=True)
+                    timeline_md = "".join([
+                        f"- {pos_map[d['position']]}（{d['date']}）：{d['close']:.2f}，{d['change']*100:.2f}% -> {['阴','阳'][int(d['type'] in [7,9])]}<br>"
+                        for d in ordered_lines
+                    ])
+                    st.markdown(timeline_md, unsafe_allow_html=True)
 
-                        st.markdown("### 📜 卦辞分析")
-                        analysis_text = textwrap.dedent(f"""
-                        - 本卦『{ben_info['name']}』：{ben_info['judgment']}<br>
-                        - 象义解读：{ben_info['interp']}
-                        - 趋势提示：{ben_info.get('outlook', 'neutral').upper()} 参考，守正兼顾顺势。
-                        """).strip()
-                        st.markdown(analysis_text, unsafe_allow_html=True)
+                    st.markdown("### 📜 卦辞分析")
+                    analysis_text = market_analysis_md(ben_code)
+                    st.markdown(analysis_text, unsafe_allow_html=True)
 
-                        st.markdown("### 🤖 AI 解签")
-                        ai_text = generate_ai_reading(ben_info, zhi_info, ben_key != zhi_key)
-                        st.info(ai_text)
+                    st.markdown("### 🤖 AI 解签")
+                    ai_text = generate_ai_reading(ben_info, zhi_info, ben_code != zhi_code)
+                    st.info(ai_text)
+
+            except Exception as e:
+                # 标出出错的阶段；没有 span 出错说明异常来自界面代码本身
+                st.error(f"Data Error [{failed_stage(run_spans) or 'ui'}]: {e}")
+
+        METRICS.observe("run", time.perf_counter() - run_started, symbol)
+        write_prometheus()
+
+        # 调试面板：本次各阶段耗时 + 该品种的累计分位数 + 各缓存命中率
+        with st.expander("🛠️ Debug · 阶段耗时 (Timings)"):
+            st.caption(f"本次总耗时 {(time.perf_counter() - run_started) * 1000:.1f} ms；读数缓存命中时不会出现 download / compute")
+            if run_spans:
+                st.dataframe(pd.DataFrame([
+                    {"Stage": s["stage"], "ms": round(s["seconds"] * 1000, 2), "Error": s["error"] or ""}
+                    for s in run_spans
+                ]), use_container_width=True)
+            latency = pd.DataFrame([r for r in METRICS.summary() if r["symbol"] == symbol])
+            if len(latency):
+                for col in ("mean", "p50", "p95", "p99", "max"):
+                    latency[col] = (latency[col] * 1000).round(2)
+                st.markdown("**累计延迟 (ms)**")
+                st.dataframe(latency.drop(columns="symbol").set_index("stage"), use_container_width=True)
+            st.markdown("**缓存 (Cache)**")
+            st.dataframe(pd.DataFrame(METRICS.cache_stats()).T, use_container_width=True)
+
+    # 全部品种：并发取数，一张汇总表；单个品种出错不影响其它品种
+    if run_all:
+        with st.spinner("Scanning watchlist..."):
+            summary = run_watchlist(list(WATCHLIST), date_val, store=get_bar_store())
 
-            except Exception as e:
-                st.error(f"Data Error: {e}")
+        st.markdown("---")
+        st.subheader("📋 Watchlist Summary")
+        summary_rows = []
+        for r in summary.to_dict("records"):
+            if r["error"]:
+                summary_rows.append({"Asset": WATCHLIST.get(r["symbol"], r["symbol"]), "Error": r["error"]})
+                continue
+            summary_rows.append({
+                "Asset": WATCHLIST.get(r["symbol"], r["symbol"]),
+                "Date": r["date"],
+                "Close": f"{r['close']:.2f}",
+                "Chg%": f"{r['change']*100:.2f}%",
+                "本卦": r["ben_name"],
+                "之卦": r["zhi_name"] if r["zhi"] != r["ben"] else "—",
+                "动爻": r["moving"],
+                "Outlook": r["outlook"].upper(),
+            })
+        st.dataframe(pd.DataFrame(summary_rows), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 # --- DAILY TAB ---
@@ -379,79 +377,146 @@ with tab_daily:
             st.warning("请先输入问题")
         else:
             with st.spinner("正在以此诚心，沟通天地..."):
-                time.sleep(1.5)
-                
-                lines = []
-                for _ in range(6):
-                    c1 = 3 if random.random() > 0.5 else 2
-                    c2 = 3 if random.random() > 0.5 else 2
-                    c3 = 3 if random.random() > 0.5 else 2
-                    lines.append(c1 + c2 + c3)
-                
-                ben_res = []
-                zhi_res = []
-                for val in lines:
-                    if val in [7, 9]: 
-                        ben_res.append("1")
-                        zhi_res.append("0" if val == 9 else "1")
-                    else: 
-                        ben_res.append("0")
-                        zhi_res.append("1" if val == 6 else "0")
+                # 等待感由前端动画提供；GUA_CAST_DELAY 可恢复服务端停顿
+                if CAST_DELAY:
+                    time.sleep(CAST_DELAY)
+
+                # 每个会话一个随机数发生器（设置 GUA_CAST_SEED 可复现）
+                if "cast_rng" not in st.session_state:
+                    st.session_state.cast_rng = make_rng()
+                lines = cast(st.session_state.cast_rng)
                 
-                d_ben_key = ",".join(ben_res)
-                d_zhi_key = ",".join(zhi_res)
+                d_ben_code, d_zhi_code = line_codes(lines)
                 
-                d_ben = HEXAGRAMS[d_ben_key]
-                d_zhi = HEXAGRAMS[d_zhi_key]
-
-                ben_html = get_hexagram_html(d_ben_key)
-                zhi_html = get_hexagram_html(d_zhi_key)
-                d_ben_interp = d_ben['interp'].replace('\n', '')
-
-                # Daily Result Card
-                daily_html = textwrap.dedent(f"""
-                <div class="trad-card" style="background-color:#fffbf0; border:2px solid #b91c1c; border-radius:15px; padding:20px; margin-top:20px;">
-                    <div style="text-align:center; margin-bottom:20px; color:#b91c1c; font-weight:bold; font-size:18px;">问：{question}</div>
-                    
-                    <div style="display:flex; justify-content:space-around; align-items:flex-start;">
-                        <div style="text-align:center; flex:1;">
-                            <div style="font-size:12px; color:#888; margin-bottom:8px;">本卦 (现状)</div>
-                            {ben_html}
-                            <div class="calligraphy" style="font-size:32px; margin-top:8px; color:#333;">{d_ben['name']}</div>
-                            <div style="font-size:13px; color:#666;">{d_ben['judgment']}</div>
-                        </div>
-                        
-                        <div style="text-align:center; flex:1; opacity: {1.0 if d_ben_key != d_zhi_key else 0.3};">
-                            <div style="font-size:12px; color:#888; margin-bottom:8px;">之卦 (变数)</div>
-                            {zhi_html}
-                            <div class="calligraphy" style="font-size:32px; margin-top:8px; color:#333;">{d_zhi['name']}</div>
-                            <div style="font-size:13px; color:#666;">{d_zhi['judgment']}</div>
-                        </div>
-                    </div>
-                    
-                    <hr style="border-color:#e5e7eb; margin:20px 0;">
-                    
-                    <div style="background:rgba(255,255,255,0.6); padding:15px; border-radius:8px; border:1px dashed #d1d5db;">
-                        <p style="font-weight:bold; color:#b91c1c; margin-bottom:5px;">💡 锦囊妙计：</p>
-                        <div style="line-height:1.6; font-size:14px; color:#333;">
-                            {d_ben_interp}
-                        </div>
-                        {f'<div style="margin-top:10px; font-size:13px; color:#d97706;">⚡ <strong>变爻启示：</strong>局势正在向 {d_zhi["name"]} 转变，请参考之卦建议。</div>' if d_ben_key != d_zhi_key else ''}
-                    </div>
-                </div>
-                """).strip()
+                d_ben = HEXAGRAMS[d_ben_code]
+                d_zhi = HEXAGRAMS[d_zhi_code]
+
+                # Daily Result Card
+                daily_html = f'<div class="cast-reveal">{daily_card_html(d_ben_code, d_zhi_code, question)}</div>'
                 
                 st.markdown(daily_html, unsafe_allow_html=True)
 
                 st.markdown("#### 📜 卦辞分析")
-                st.markdown(textwrap.dedent(f"""
-                - 本卦『{d_ben['name']}』：{d_ben['judgment']}<br>
-                - 之卦『{d_zhi['name']}』：{d_zhi['judgment']}<br>
-                - 释义：{d_ben['interp']}
-                """), unsafe_allow_html=True)
+                st.markdown(daily_analysis_md(d_ben_code, d_zhi_code), unsafe_allow_html=True)
 
                 st.markdown("#### 🤖 AI 解签")
-                ai_daily = generate_ai_reading(d_ben, d_zhi, d_ben_key != d_zhi_key, question)
+                ai_daily = generate_ai_reading(d_ben, d_zhi, d_ben_code != d_zhi_code, question)
                 st.info(ai_daily)
 
+    # 蒙特卡洛：百万次起卦的爻值/卦象分布与理论值对照
+    with st.expander("📊 起卦概率分布 (Monte Carlo)"):
+        mc_n = st.select_slider("模拟次数", options=[10_000, 100_000, 1_000_000, 5_000_000], value=1_000_000,
+                                format_func=lambda n: f"{n:,}")
+        if st.button("运行模拟 (SIMULATE)", use_container_width=True):
+            mc = cast_stats(mc_n, make_rng())
+            st.markdown("**爻值频率** (理论 6/9 = 1/8，7/8 = 3/8)")
+            st.dataframe(mc.lines.style.format({"freq": "{:.4%}", "expected": "{:.4%}"}), use_container_width=True)
+            st.markdown("**本卦频率** (理论 1/64 ≈ 1.5625%)")
+            st.bar_chart(mc.hexagrams.set_index("name")["ben_freq"])
+            moving_share = 1 - mc.transitions.trace() / mc.n
+            st.caption(f"{mc.n:,} 次起卦 · 有动爻的比例 {moving_share:.2%}（理论 {1 - 0.75 ** 6:.2%}）")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# --- BACKTEST TAB ---
+with tab_backtest:
+    st.markdown('<div class="tech-font">', unsafe_allow_html=True)
+
+    bt_symbols = st.multiselect("选择品种 (Assets)", list(WATCHLIST), default=list(WATCHLIST),
+                                format_func=lambda x: WATCHLIST[x])
+    bc1, bc2, bc3 = st.columns(3)
+    with bc1:
+        bt_start = st.date_input("开始日期 (Start)", datetime.now() - timedelta(days=365 * 5))
+    with bc2:
+        bt_signal = st.selectbox("信号 (Signal)", ["ben", "zhi"],
+                                 format_func=lambda x: {"ben": "本卦 (Current)", "zhi": "之卦 (Projection)"}[x])
+    with bc3:
+        bt_lookback = st.number_input("阈值回看 (Lookback Bars)", min_value=6, max_value=250, value=DEFAULT_LOOKBACK)
+
+    # outlook -> 仓位 映射
+    position_labels = {1: "做多 (+1)", 0: "空仓 (0)", -1: "做空 (-1)"}
+    mc1, mc2, mc3 = st.columns(3)
+    bt_mapping = {
+        "bullish": mc1.selectbox("BULLISH →", [1, 0, -1], index=0, format_func=position_labels.get),
+        "bearish": mc2.selectbox("BEARISH →", [1, 0, -1], index=2, format_func=position_labels.get),
+        "neutral": mc3.selectbox("NEUTRAL →", [1, 0, -1], index=1, format_func=position_labels.get),
+    }
+
+    if st.button("📉 运行回测 (RUN BACKTEST)", type="primary", disabled=not bt_symbols):
+        bt_archive = Archive(archive_root(), lookback=int(bt_lookback))
+        with st.spinner("Backtesting..."):
+            if all(bt_archive.exists(s) for s in bt_symbols):
+                # 全部品种都有同参数的归档：直接读落盘的卦码，不取数、不重算
+                bt_views = {s: bt_archive.view(s, bt_start) for s in bt_symbols}
+                bt_summary, bt_by_hexagram, bt_equity = backtest_archived(bt_views, mapping=bt_mapping, signal=bt_signal)
+                bt_last = max((v.dates[-1] for v in bt_views.values() if len(v)), default=None)
+                st.caption(f"卦码来自归档 {bt_archive.root}" + (f"（截至 {bt_last:%Y-%m-%d}）" if bt_last is not None else ""))
+            else:
+                # 开始日期为首个信号日：之前多取一段K线预热阈值
+                frames = fetch_many(bt_symbols, warmup_start(bt_start, int(bt_lookback)), reading_window(datetime.now())[1],
+                                    store=get_bar_store())
+                for bt_symbol, bt_df in frames.items():
+                    if isinstance(bt_df, Exception):
+                        st.warning(f"{WATCHLIST.get(bt_symbol, bt_symbol)}: Data Error: {bt_df}")
+                frames = {k: v for k, v in frames.items() if not isinstance(v, Exception) and len(v)}
+                bt_summary, bt_by_hexagram, bt_equity = backtest_many(
+                    frames, mapping=bt_mapping, signal=bt_signal, lookback=int(bt_lookback), start=bt_start
+                )
+
+        st.subheader("📊 Summary")
+        st.dataframe(bt_summary, use_container_width=True)
+        if bt_equity:
+            st.subheader("📈 Equity")
+            st.line_chart(pd.DataFrame(bt_equity))
+        st.subheader("☯️ 按卦统计 (Per Hexagram)")
+        st.dataframe(bt_by_hexagram, use_container_width=True)
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# --- UNIVERSE TAB ---
+with tab_universe:
+    st.markdown('<div class="tech-font">', unsafe_allow_html=True)
+
+    uc1, uc2 = st.columns([2, 1])
+    with uc1:
+        un_names = st.multiselect("品种池 (Universes)", list(UNIVERSES), default=["energy_futures", "energy_equities"])
+        un_extra = st.text_input("追加代码 (Extra Tickers)", placeholder="逗号分隔，如 XLE, USO")
+    with uc2:
+        un_days = st.number_input("比较窗口数 (Days)", min_value=10, max_value=250, value=SEQUENCE_DAYS)
+        un_threshold = st.slider("聚类距离 (Hamming ≤)", min_value=0.5, max_value=4.0, value=2.5, step=0.25)
+
+    un_symbols = list(dict.fromkeys(
+        universe_symbols(un_names) + [s.strip().upper() for s in un_extra.split(",") if s.strip()]
+    ))
+    if st.button(f"🌐 扫描 {len(un_symbols)} 个品种 (SCAN)", type="primary", disabled=not un_symbols):
+        with st.spinner("Scanning universe..."):
+            end_excl = reading_window(datetime.now())[1]
+            # 取数跨度按交易日估算：比较窗口 + 阈值回看 + 6 爻，再留出节假日余量
+            un_start = end_excl - timedelta(days=int((un_days + DEFAULT_LOOKBACK + 6) * 1.6) + 10)
+            scan_result = scan_universe(un_symbols, un_start, end_excl, store=get_bar_store(),
+                                        days=int(un_days), threshold=un_threshold)
+
+        if scan_result.errors:
+            st.warning("无法获取：" + ", ".join(scan_result.errors))
+        current = scan_result.current
+        if len(current):
+            st.subheader("☯️ 当前卦象 (Current)")
+            st.dataframe(current.drop(columns=["ben", "zhi"]), use_container_width=True)
+
+            sc1, sc2 = st.columns(2)
+            with sc1:
+                st.markdown("**同一本卦 (Shared 本卦)**")
+                shared = current.dropna(subset=["ben_name"]).reset_index().groupby("ben_name")["symbol"].agg(", ".join)
+                st.dataframe(shared[shared.str.contains(",")].rename("symbols"), use_container_width=True)
+            with sc2:
+                st.markdown("**Outlook 分布**")
+                st.dataframe(current.groupby("outlook").size().rename("count"), use_container_width=True)
+
+            st.subheader("🧬 近期序列距离 (Hamming, 0~6)")
+            order = list(current.index)
+            st.dataframe(scan_result.distance.loc[order, order].round(2), use_container_width=True)
+            st.caption(f"按簇排序；距离为最近 {int(un_days)} 个窗口本卦的逐日平均 Hamming 距离，"
+                       f"随机序列约为 3。Outlook 一致率见下表。")
+            st.dataframe(scan_result.agreement.loc[order, order].round(2), use_container_width=True)
+
     st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,6 @@
+"""离线性能基准：用固定种子生成的 OHLCV 夹具，不访问网络。
+
+    python -m benchmarks.run                 # 与 benchmarks/baseline.json 对比，超出阈值则退出码为 1
+    python -m benchmarks.run --save          # 重新记录基线
+    python -m benchmarks.run --only render   # 只跑名称包含 render 的用例
+"""
@@ -0,0 +1,37 @@
+"""基准夹具：固定种子的几何布朗运动日线，写成 FileProvider 可读的 CSV。"""
+import os
+
+import numpy as np
+import pandas as pd
+
+SYMBOLS = ("BZ=F", "NG=F", "TTF=F", "RB=F")
+START = "2012-01-02"
+END = "2024-12-31"
+# 市场页基准日期：落在夹具中段，10 年历史与 2 年月线都有数据
+AS_OF = "2024-03-01"
+
+
+def make_bars(n=None, seed=0, start=START, end=END, price=80.0, vol=0.02):
+    """工作日日线 OHLCV；给定 n 时只生成 n 根（从 start 开始）。"""
+    index = pd.bdate_range(start, end) if n is None else pd.bdate_range(start, periods=n)
+    rng = np.random.default_rng(seed)
+    closes = price * np.exp(np.cumsum(rng.normal(0, vol, len(index))))
+    opens = np.r_[price, closes[:-1]] * np.exp(rng.normal(0, vol / 4, len(index)))
+    spread = np.abs(rng.normal(0, vol / 2, len(index)))
+    return pd.DataFrame({
+        "Open": opens,
+        "High": np.maximum(opens, closes) * (1 + spread),
+        "Low": np.minimum(opens, closes) * (1 - spread),
+        "Close": closes,
+        "Volume": rng.integers(1_000, 100_000, len(index)).astype(float),
+    }, index=pd.DatetimeIndex(index, name="Date"))
+
+
+def write_fixtures(root, symbols=SYMBOLS):
+    """在 root 下写出各品种的 <symbol>.csv（已存在则跳过），返回 root。"""
+    os.makedirs(root, exist_ok=True)
+    for seed, symbol in enumerate(symbols):
+        path = os.path.join(root, f"{symbol}.csv")
+        if not os.path.exists(path):
+            make_bars(seed=seed).to_csv(path)
+    return root
@@ -0,0 +1,285 @@
+"""压力测试：本地起一个真实的 streamlit server（离线数据源），用 N 个并发 websocket 客户端模拟 N 个会话。
+
+每个会话：打开页面 -> 若干轮（市场页切品种/日期并 RUN MODEL，每日一卦页输入问题并 SHAKE）。
+一次重跑的延迟 = 发出 rerun_script 到收到 script_finished。报告每种操作的 p50/p95/p99、
+总吞吐（次重跑/秒）与每会话内存（server 常驻内存增量 / 会话数）。
+--sessions 可给多档（如 1,8,32），逐档加压找出延迟开始劣化的并发数。
+
+AppTest 在同一进程内并发运行会互相覆盖全局 Runtime，不适合做并发压测，所以这里走真实协议。
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.fixtures import AS_OF
+from benchmarks.run import APP, ROOT, _context, _format_time
+
+QUESTIONS = ("问财运", "问事业", "今日行情如何", "是否加仓")
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 300
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_bytes(pid):
+    """进程常驻内存（读 /proc）；不支持的平台返回 None。"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _quantile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def start_server(workdir):
+    """后台启动 streamlit server，等到健康检查通过；返回 (进程, 端口)。"""
+    port = _free_port()
+    log = open(os.path.join(workdir, "server.log"), "wb")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP,
+         "--server.headless", "true",
+         "--server.port", str(port),
+         "--server.fileWatcherType", "none",
+         "--global.developmentMode", "false",
+         "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, stdout=log, stderr=subprocess.STDOUT, env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"streamlit server 未能启动，见 {log.name}")
+
+
+class Session:
+    """一个浏览器会话：维护控件状态，按控件标签点按钮/填值，并计时每次重跑。"""
+
+    def __init__(self, ws, samples):
+        self.ws = ws
+        self.samples = samples
+        self.widgets = {}  # 标签 -> 控件 proto（首屏时收集）
+        self.states = {}  # 控件 id -> WidgetState
+
+    def _state(self, label):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget = self.widgets[label]
+        state = self.states.setdefault(widget.id, WidgetState(id=widget.id))
+        return widget, state
+
+    def select(self, label, index):
+        widget, state = self._state(label)
+        state.string_value = widget.options[index % len(widget.options)]
+
+    def set_date(self, label, value):
+        _, state = self._state(label)
+        state.string_array_value.data[:] = [value.isoformat()]
+
+    def type(self, label, text):
+        _, state = self._state(label)
+        state.string_value = text
+
+    async def rerun(self, action, click=None):
+        """发一次重跑（click 为按钮标签时附带一次触发），等到 script_finished。"""
+        from streamlit.proto.Alert_pb2 import Alert
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        if click is not None:
+            trigger = msg.rerun_script.widget_states.widgets.add(id=self.widgets[click].id)
+            trigger.trigger_value = True
+
+        errors = []
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT))
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                element = fm.delta.new_element
+                name = element.WhichOneof("type")
+                proto = getattr(element, name)
+                if name == "exception":
+                    errors.append(proto.message)
+                elif name == "alert" and proto.format == Alert.ERROR:
+                    errors.append(proto.body)
+                elif getattr(proto, "id", "") and getattr(proto, "label", None) is not None:
+                    self.widgets[proto.label or proto.id] = proto
+            elif kind == "script_finished":
+                break
+        self.samples.append((action, time.perf_counter() - start))
+        if errors:
+            raise RuntimeError(f"{action}: {errors[0]}")
+
+
+async def session(url, index, iterations, think, samples, loaded, go):
+    import websockets
+
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        s = Session(ws, samples)
+        await s.rerun("load")
+        loaded()
+        # 所有会话首屏完成后再一起开始交互，保证交互阶段真正并发
+        await go.wait()
+        as_of = datetime.date.fromisoformat(AS_OF)
+        question = next(label for label, w in s.widgets.items() if w.id.endswith("-q_input"))
+        for i in range(iterations):
+            # 品种与日期错开：既有缓存命中也有未命中
+            s.select("选择品种 (Asset)", index + i)
+            s.set_date("基准日期 (Date)", as_of - datetime.timedelta(days=(index * iterations + i) % 30))
+            await s.rerun("run_model", click="🚀 启动量化模型 (RUN MODEL)")
+            await asyncio.sleep(think)
+            s.type(question, QUESTIONS[(index + i) % len(QUESTIONS)])
+            await s.rerun("shake", click="🎲 掷出六爻 (SHAKE)")
+            await asyncio.sleep(think)
+
+
+async def run_level(url, pid, sessions, iterations, think):
+    """并发 sessions 个会话跑完，返回该档的统计。"""
+    samples, errors = [], []
+    base = rss_bytes(pid)
+    peak = base
+    go = asyncio.Event()
+    pending = [sessions]
+
+    def loaded():
+        pending[0] -= 1
+        if pending[0] == 0:
+            go.set()
+
+    async def guarded(index):
+        try:
+            await session(url, index, iterations, think, samples, loaded, go)
+        except Exception as e:
+            errors.append(f"session {index}: {type(e).__name__}: {e}")
+            loaded()
+
+    async def watch_memory():
+        nonlocal peak
+        while True:
+            rss = rss_bytes(pid)
+            if rss is not None:
+                peak = max(peak, rss)
+            await asyncio.sleep(0.1)
+
+    watcher = asyncio.create_task(watch_memory())
+    start = time.perf_counter()
+    await asyncio.gather(*(guarded(i) for i in range(sessions)))
+    wall = time.perf_counter() - start
+    watcher.cancel()
+
+    actions = {}
+    for action, seconds in samples:
+        actions.setdefault(action, []).append(seconds)
+    return {
+        "sessions": sessions,
+        "reruns": len(samples),
+        "wall": wall,
+        "throughput": len(samples) / wall if wall else float("nan"),
+        "rss_base": base,
+        "rss_peak": peak,
+        "mem_per_session": max(peak - base, 0) / sessions if base is not None else None,
+        "errors": errors,
+        "actions": {
+            action: {
+                "count": len(values),
+                "p50": _quantile(values, 0.50),
+                "p95": _quantile(values, 0.95),
+                "p99": _quantile(values, 0.99),
+                "max": max(values),
+            }
+            for action, values in sorted(actions.items())
+        },
+    }
+
+
+def _mib(n):
+    return "n/a" if n is None else f"{n / 2 ** 20:.1f} MiB"
+
+
+def _print_level(level):
+    print(f"\n== {level['sessions']} session(s): {level['reruns']} reruns in {level['wall']:.2f} s, "
+          f"{level['throughput']:.1f} reruns/s, {_mib(level['mem_per_session'])}/session "
+          f"(server RSS {_mib(level['rss_base'])} -> {_mib(level['rss_peak'])})")
+    print(f"{'action':<12}{'count':>7}{'p50':>12}{'p95':>12}{'p99':>12}{'max':>12}")
+    for action, s in level["actions"].items():
+        print(f"{action:<12}{s['count']:>7}" + "".join(f"{_format_time(s[k]):>12}" for k in ("p50", "p95", "p99", "max")))
+    for error in level["errors"]:
+        print(f"  ERROR {error}", file=sys.stderr)
+    sys.stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.loadtest", description="并发会话压力测试")
+    parser.add_argument("--sessions", default="1,4,16", help="并发会话数，逗号分隔的多档逐档运行")
+    parser.add_argument("--iterations", type=int, default=3, help="每个会话的 RUN MODEL + SHAKE 轮数")
+    parser.add_argument("--think", type=float, default=0.0, help="两次操作之间的思考时间（秒）")
+    parser.add_argument("--url", help="压测已运行的 server（ws://host:port/_stcore/stream），不再本地启动")
+    parser.add_argument("--p95-limit", type=float, help="任一操作 p95 超过该秒数即以非零退出")
+    parser.add_argument("--output", help="结果写入 JSON")
+    args = parser.parse_args(argv)
+    levels = [int(n) for n in args.sessions.split(",") if n.strip()]
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        parser.error("需要 websockets 包: pip install websockets")
+
+    results, failed = [], False
+    with tempfile.TemporaryDirectory(prefix="gua-load-") as workdir:
+        proc = None
+        if args.url:
+            url, pid = args.url, None
+        else:
+            _context(workdir)
+            proc, port = start_server(workdir)
+            url, pid = f"ws://127.0.0.1:{port}/_stcore/stream", proc.pid
+        try:
+            # 预热：脚本编译、建库与首次取数不计入任何一档
+            asyncio.run(run_level(url, pid, 1, 1, 0))
+            for n in levels:
+                level = asyncio.run(run_level(url, pid, n, args.iterations, args.think))
+                _print_level(level)
+                results.append(level)
+                failed |= bool(level["errors"])
+                if args.p95_limit is not None:
+                    failed |= any(s["p95"] > args.p95_limit for s in level["actions"].values())
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""基准运行器：逐个用例取多轮中位数，与基线对比，超出阈值即判为退化。"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.fixtures import AS_OF, SYMBOLS, make_bars, write_fixtures
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+THRESHOLD = 0.25
+
+CASES = []
+
+
+def case(name, number=None, repeat=None, tolerance=None):
+    """登记一个用例：被装饰函数接收上下文 dict，返回待计时的无参函数。
+
+    number / repeat 覆盖每轮次数与轮数；tolerance 为该用例允许的变慢比例（不低于 --threshold）。
+    """
+    def register(setup):
+        CASES.append((name, setup, number, repeat, tolerance))
+        return setup
+    return register
+
+
+# --- 计算 ---
+for _n in (6, 40, 250, 2500):
+    @case(f"core.calculate_hexagram[{_n}]")
+    def _calc(ctx, n=_n):
+        from gua.core import calculate_hexagram
+        df = make_bars(n)
+        return lambda: calculate_hexagram(df)
+
+
+@case("engine.hexagram_series[2500]")
+def _series(ctx):
+    from gua.engine import hexagram_series
+    df = make_bars(2500)
+    return lambda: hexagram_series(df)
+
+
+@case("core.generate_ai_reading")
+def _reading(ctx):
+    from gua.core import generate_ai_reading
+    from gua.hexagrams import HEXAGRAMS
+    return lambda: generate_ai_reading(HEXAGRAMS[5], HEXAGRAMS[37], True, "问财运")
+
+
+# --- 渲染 ---
+@case("render.get_hexagram_html[64]")
+def _hex_html(ctx):
+    from gua.render import get_hexagram_html
+    return lambda: [get_hexagram_html(code) for code in range(64)]
+
+
+@case("render.cards.cold")
+def _cards_cold(ctx):
+    from gua.render import ben_card_html, market_analysis_md, zhi_card_html
+
+    def run():
+        for fn in (ben_card_html, zhi_card_html, market_analysis_md):
+            fn.cache_clear()
+        ben_card_html(5), zhi_card_html(37, True), market_analysis_md(5)
+    return run
+
+
+@case("render.cards.warm")
+def _cards_warm(ctx):
+    from gua.render import ben_card_html, market_analysis_md, zhi_card_html
+    return lambda: (ben_card_html(5), zhi_card_html(37, True), market_analysis_md(5))
+
+
+@case("render.daily_card_html")
+def _daily_card(ctx):
+    from gua.render import daily_card_html
+    return lambda: daily_card_html(5, 37, "问财运")
+
+
+# --- 取数：FileProvider + SQLite 仓库 ---
+def _store_range():
+    end = pd.Timestamp(AS_OF) + pd.Timedelta(days=1)
+    return end - pd.DateOffset(years=10), end
+
+
+@case("store.get_bars.cold")
+def _store_cold(ctx):
+    # 每次新建内存库：读 CSV、写入 SQLite、再读出
+    from gua.store import BarStore, FileProvider
+    start, end = _store_range()
+    return lambda: BarStore(":memory:", FileProvider(ctx["fixtures"])).get_bars(SYMBOLS[0], start, end)
+
+
+@case("store.get_bars.warm")
+def _store_warm(ctx):
+    # 已覆盖的区间：只查覆盖表并读本地
+    from gua.store import BarStore, FileProvider
+    start, end = _store_range()
+    store = BarStore(":memory:", FileProvider(ctx["fixtures"]))
+    store.get_bars(SYMBOLS[0], start, end)
+    return lambda: store.get_bars(SYMBOLS[0], start, end)
+
+
+# --- 端到端：AppTest 无头运行市场页 ---
+def _market_tab():
+    import datetime
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    at.date_input[0].set_value(datetime.date.fromisoformat(AS_OF))
+    next(b for b in at.button if "RUN MODEL" in b.label).click().run()
+    if at.exception or at.error:
+        raise RuntimeError(f"market tab failed: {[e.value for e in at.exception] + [e.value for e in at.error]}")
+    return at
+
+
+def _reset_app_state(ctx):
+    import streamlit as st
+
+    st.cache_resource.clear()
+    if os.path.exists(ctx["store_path"]):
+        os.remove(ctx["store_path"])
+
+
+# 单次端到端运行抖动大：多跑几次取中位数，并放宽容差
+@case("pipeline.market_tab.cold", number=3, repeat=7, tolerance=0.5)
+def _pipeline_cold(ctx):
+    # 每次都清空进程内缓存与本地K线库：包含取数、建索引、渲染
+    def run():
+        _reset_app_state(ctx)
+        _market_tab()
+    return run
+
+
+@case("pipeline.market_tab.warm", number=5, repeat=7, tolerance=0.5)
+def _pipeline_warm(ctx):
+    _reset_app_state(ctx)
+    _market_tab()
+    return _market_tab
+
+
+def _timed(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+def measure(fn, repeat=5, number=None, min_time=0.05):
+    """多轮计时的中位数（秒/次）；number 未给出时自动放大到每轮至少 min_time 秒。"""
+    fn()
+    if number is None:
+        number = 1
+        while _timed(fn, number) < min_time and number < 10 ** 6:
+            number *= 10
+    return statistics.median(_timed(fn, number) / number for _ in range(repeat))
+
+
+def _context(workdir):
+    fixtures = write_fixtures(os.path.join(workdir, "fixtures"))
+    ctx = {"fixtures": fixtures, "store_path": os.path.join(workdir, "bars.sqlite")}
+    # app.py 与 BarStore 通过环境变量切到离线数据源
+    os.environ["GUA_PROVIDER"] = f"file:{fixtures}"
+    os.environ["GUA_STORE_PATH"] = ctx["store_path"]
+    os.environ.setdefault("GUA_CAST_SEED", "0")
+    return ctx
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("cases", {})
+
+
+def save_baseline(path, results):
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "symbols": list(SYMBOLS),
+        "cases": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description="离线性能基准")
+    parser.add_argument("--only", help="只运行名称包含该子串的用例")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的计时轮数")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="允许比基线慢的比例，默认 0.25")
+    parser.add_argument("--baseline", default=BASELINE, help="基线 JSON 路径")
+    parser.add_argument("--save", action="store_true", help="把本次结果写为新基线（--only 时只更新对应用例）")
+    parser.add_argument("--output", help="本次结果写入 JSON")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    baseline = load_baseline(args.baseline)
+    results, regressions = {}, []
+    with tempfile.TemporaryDirectory(prefix="gua-bench-") as workdir:
+        ctx = _context(workdir)
+        for name, setup, number, repeat, tolerance in CASES:
+            if args.only and args.only not in name:
+                continue
+            seconds = measure(setup(ctx), repeat or args.repeat, number)
+            limit = args.threshold if tolerance is None else max(tolerance, args.threshold)
+            results[name] = seconds
+            base = baseline.get(name)
+            if base is None:
+                status = "new"
+            else:
+                ratio = seconds / base
+                status = f"{ratio:.2f}x"
+                if ratio > 1 + limit:
+                    status += "  REGRESSION"
+                    regressions.append(name)
+            print(f"{name:<36} {_format_time(seconds):>12}   {status}", flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save:
+        save_baseline(args.baseline, {**baseline, **results})
+        print(f"baseline saved: {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond tolerance: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""能源·周易量化 的计算核心（不依赖 Streamlit）。
+
+顶层名称按需导入：`from gua import calculate_hexagram` 只加载标准库，
+用到 BarStore / hexagram_series 等时才会导入 pandas、NumPy。
+"""
+import importlib
+
+_EXPORTS = {
+    "HEXAGRAMS": "gua.hexagrams",
+    "TRANSITIONS": "gua.hexagrams",
+    "calculate_hexagram": "gua.core",
+    "generate_ai_reading": "gua.core",
+    "hexagram_series": "gua.engine",
+    "BarStore": "gua.store",
+    "run_watchlist": "gua.batch",
+    "backtest_many": "gua.backtest",
+    "OccurrenceIndex": "gua.occurrence",
+    "ReadingCache": "gua.cache",
+    "cast": "gua.casting",
+    "scan_universe": "gua.universe",
+    "Archive": "gua.archive",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'gua' has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
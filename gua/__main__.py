@@ -0,0 +1,5 @@
+import sys
+
+from gua.cli import main
+
+sys.exit(main())
@@ -0,0 +1,255 @@
+"""卦象历史归档：每个品种一个定长记录的二进制文件，只追加写入，读取时内存映射、零拷贝。
+
+文件 = 128 字节头（魔数 + JSON 参数）+ 若干 14 字节记录：
+    date   int32   相对 1970-01-01 的偏移（单位见头部 unit：D 天 / m 分钟）
+    codes  uint16  本卦 (第 0-5 位) 与之卦 (第 6-11 位) 两个 6 位编码
+    open   float32 窗口末根K线开盘价（续算滚动阈值用）
+    close  float32 窗口末根K线收盘价（回测/前瞻收益用）
+爻值不单独存：本卦给出阴阳，本卦 ^ 之卦 即动爻掩码，读取时按需还原为 6/7/8/9。
+记录数由文件长度推出；写入中途断电留下的半条记录在读取时被忽略，下次追加前截掉。
+阈值参数（倍数、回看、定义）写在头部并体现在文件名里，同一品种可并存多套参数的归档。
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from gua.backtest import DEFAULT_LOOKBACK
+from gua.engine import WINDOW, context_start, line_matrix, lines_to_codes
+
+MAGIC = b"GUA\x02"
+HEADER_SIZE = 128
+RECORD = np.dtype([
+    ("date", "<i4"),
+    ("codes", "<u2"),
+    ("open", "<f4"),
+    ("close", "<f4"),
+])
+CODE_BITS = 6
+CODE_MASK = (1 << CODE_BITS) - 1
+UNITS = ("D", "m")
+
+
+def archive_root():
+    """归档目录：GUA_ARCHIVE，默认 ~/.cache/gua/archive。"""
+    return os.environ.get("GUA_ARCHIVE", os.path.join(os.path.expanduser("~"), ".cache", "gua", "archive"))
+
+
+def lookback_tag(lookback):
+    """回看参数的文本形式（写入头部与文件名）：整数为K线根数，时间跨度如 "40D" / "3600s"。"""
+    if isinstance(lookback, (int, np.integer)):
+        return int(lookback)
+    td = pd.Timedelta(lookback)
+    return f"{td.days}D" if td == pd.Timedelta(days=td.days) else f"{int(td.total_seconds())}s"
+
+
+def parse_lookback(tag):
+    return tag if isinstance(tag, int) else pd.Timedelta(tag)
+
+
+def _header(unit, multiplier, lookback, method):
+    meta = json.dumps({"unit": unit, "multiplier": multiplier, "lookback": lookback, "method": method},
+                      separators=(",", ":")).encode()
+    if len(MAGIC) + len(meta) > HEADER_SIZE:
+        raise ValueError("归档头部过长")
+    return MAGIC + meta.ljust(HEADER_SIZE - len(MAGIC))
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE or not raw.startswith(MAGIC[:3]):
+        raise ValueError(f"不是卦象归档文件: {path}")
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"归档格式版本不符，请用 archive 子命令重建: {path}")
+    return json.loads(raw[len(MAGIC):].decode().strip())
+
+
+def to_offsets(dates, unit="D"):
+    """时间 -> int32 偏移；超出 int32 范围时报错而不是静默溢出。"""
+    values = np.asarray(pd.DatetimeIndex(dates).values.astype(f"datetime64[{unit}]").astype(np.int64))
+    if len(values) and (values.min() < np.iinfo(np.int32).min or values.max() > np.iinfo(np.int32).max):
+        raise OverflowError("日期超出 int32 偏移范围")
+    return values.astype(np.int32)
+
+
+class ArchiveView:
+    """只读视图：各列均为内存映射上的切片，不复制数据。"""
+
+    def __init__(self, records, meta):
+        self.records = records
+        self.meta = meta
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def offsets(self):
+        return self.records["date"]
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex(self.offsets.astype(f"datetime64[{self.meta['unit']}]").astype("datetime64[ns]"))
+
+    @property
+    def ben(self):
+        return (self.records["codes"] & CODE_MASK).astype(np.uint8)
+
+    @property
+    def zhi(self):
+        return (self.records["codes"] >> CODE_BITS & CODE_MASK).astype(np.uint8)
+
+    @property
+    def moving(self):
+        return self.ben ^ self.zhi
+
+    @property
+    def lines(self):
+        """(M, 6) 爻值 6/7/8/9，由本卦与动爻掩码还原。"""
+        bits = 1 << np.arange(WINDOW)
+        yang = (self.ben[:, None] & bits) > 0
+        moving = (self.moving[:, None] & bits) > 0
+        return np.where(yang, np.where(moving, 9, 7), np.where(moving, 6, 8)).astype(np.uint8)
+
+    @property
+    def open(self):
+        return self.records["open"]
+
+    @property
+    def close(self):
+        return self.records["close"]
+
+    def slice(self, start=None, end=None):
+        """[start, end) 的子视图（按二分查找定位，仍是零拷贝）。"""
+        unit = self.meta["unit"]
+        lo = 0 if start is None else int(np.searchsorted(self.offsets, to_offsets([start], unit)[0]))
+        hi = len(self) if end is None else int(np.searchsorted(self.offsets, to_offsets([end], unit)[0]))
+        return ArchiveView(self.records[lo:hi], self.meta)
+
+    def to_frame(self):
+        """与 engine.hexagram_series 同样的列 (ben / zhi / moving)，另附 close。"""
+        return pd.DataFrame({
+            "ben": self.ben,
+            "zhi": self.zhi,
+            "moving": self.moving,
+            "close": np.asarray(self.close, dtype=float),
+        }, index=self.dates)
+
+
+def open_view(path):
+    """内存映射打开归档；文件只有头部时返回空视图。"""
+    meta = read_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize
+    if count == 0:
+        return ArchiveView(np.empty(0, dtype=RECORD), meta)
+    records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER_SIZE, shape=(count,))
+    return ArchiveView(records, meta)
+
+
+class ArchiveWriter:
+    """单个品种的只追加写入器；参数（阈值倍数、回看、单位）写在头部，之后不可更改。"""
+
+    def __init__(self, path, unit="D", multiplier=1.5, lookback=DEFAULT_LOOKBACK, method="mean"):
+        if unit not in UNITS:
+            raise ValueError(f"不支持的时间单位: {unit}")
+        if not lookback:
+            raise ValueError("追加写入需要滚动阈值 (lookback)")
+        self.path = path
+        self._lock = threading.Lock()
+        lookback = lookback_tag(lookback)
+        if os.path.exists(path):
+            self.meta = read_header(path)
+            wanted = {"unit": unit, "multiplier": multiplier, "lookback": lookback, "method": method}
+            if self.meta != wanted:
+                raise ValueError(f"归档参数不一致: {self.meta} != {wanted}")
+            # 截掉上次中断留下的半条记录
+            size = os.path.getsize(path)
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // RECORD.itemsize * RECORD.itemsize
+            if whole != size:
+                with open(path, "r+b") as f:
+                    f.truncate(whole)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(_header(unit, multiplier, lookback, method))
+            self.meta = read_header(path)
+
+    def last_offset(self):
+        view = open_view(self.path)
+        return int(view.offsets[-1]) if len(view) else None
+
+    def append(self, offsets, ben, zhi, opens, closes):
+        """追加记录；offsets 必须严格递增且晚于已有的最后一条。返回追加条数。"""
+        with self._lock:
+            offsets = np.asarray(offsets, dtype=np.int32)
+            last = self.last_offset()
+            if len(offsets) and ((np.diff(offsets) <= 0).any() or (last is not None and offsets[0] <= last)):
+                raise ValueError("只能按时间顺序追加新记录")
+            records = np.empty(len(offsets), dtype=RECORD)
+            records["date"] = offsets
+            records["codes"] = np.asarray(ben, dtype=np.uint16) | np.asarray(zhi, dtype=np.uint16) << CODE_BITS
+            records["open"] = opens
+            records["close"] = closes
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+            return len(records)
+
+    def append_bars(self, df):
+        """由K线计算滚动卦象，只追加晚于归档末尾的窗口（df 可以是完整历史，需含足够的回看）。"""
+        meta = self.meta
+        offsets = to_offsets(df.index, meta["unit"])
+        opens = df["Open"].to_numpy(dtype=float).ravel()
+        closes = df["Close"].to_numpy(dtype=float).ravel()
+        lookback = parse_lookback(meta["lookback"])
+        last = self.last_offset()
+        # 只计算能产生新窗口的尾部：新K线之前再留出阈值回看与窗口所需的K线
+        first_new = 0 if last is None else int(np.searchsorted(offsets, last, side="right"))
+        if first_new >= len(offsets):
+            return 0
+        begin = context_start(df.index, first_new, lookback)
+        ends, lines = line_matrix(opens[begin:], closes[begin:], meta["multiplier"], lookback, meta["method"],
+                                  df.index[begin:])
+        ends = ends + begin
+        new = ends >= first_new
+        ends, lines = ends[new], lines[new]
+        ben, zhi, _ = lines_to_codes(lines)
+        return self.append(offsets[ends], ben, zhi, opens[ends], closes[ends])
+
+
+class Archive:
+    """归档目录：每个 (品种, 周期, 阈值参数) 一个 <symbol>_<interval>_x<倍数>_<回看>_<定义>.gua 文件。"""
+
+    def __init__(self, root, multiplier=1.5, lookback=DEFAULT_LOOKBACK, method="mean"):
+        self.root = root
+        self.multiplier = multiplier
+        self.lookback = lookback
+        self.method = method
+
+    @property
+    def tag(self):
+        return f"x{self.multiplier:g}_{lookback_tag(self.lookback)}_{self.method}"
+
+    def path(self, symbol, interval="1d"):
+        return os.path.join(self.root, f"{symbol}_{interval}_{self.tag}.gua")
+
+    def exists(self, symbol, interval="1d"):
+        return os.path.exists(self.path(symbol, interval))
+
+    def symbols(self, interval="1d"):
+        suffix = f"_{interval}_{self.tag}.gua"
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.root) if name.endswith(suffix))
+
+    def writer(self, symbol, interval="1d"):
+        unit = "D" if interval in ("1d", "1wk", "1mo") else "m"
+        return ArchiveWriter(self.path(symbol, interval), unit, self.multiplier, self.lookback, self.method)
+
+    def update(self, symbol, df, interval="1d"):
+        """把新K线并入归档；返回新增窗口数。"""
+        return self.writer(symbol, interval).append_bars(df)
+
+    def view(self, symbol, start=None, end=None, interval="1d"):
+        return open_view(self.path(symbol, interval)).slice(start, end)
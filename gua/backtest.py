@@ -0,0 +1,192 @@
+"""卦象信号回测：用 outlook 把滚动本卦/之卦序列映射成仓位，全部向量化计算。
+
+信号在窗口最后一根K线收盘时产生，持有到下一根K线收盘；
+前瞻收益 fwd_h = close[t+h] / close[t] - 1。
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from gua.engine import WINDOW, line_matrix, lines_to_codes
+from gua.hexagrams import HEXAGRAMS
+
+DEFAULT_MAPPING = {"bullish": 1, "bearish": -1, "neutral": 0}
+HORIZONS = (1, 5, 20)
+DEFAULT_LOOKBACK = 20
+PERIODS_PER_YEAR = 252
+
+BacktestResult = namedtuple("BacktestResult", ["summary", "by_hexagram", "equity"])
+
+
+def warmup_start(start, lookback=DEFAULT_LOOKBACK):
+    """取数起点：start 之前多留足够的日历日，使 start 当天起的每个窗口都有完整阈值（与归档口径一致）。"""
+    return pd.Timestamp(start) - pd.Timedelta(days=2 * (lookback + WINDOW) + 14)
+
+
+def outlook_table(mapping=None):
+    """64 卦 -> 仓位 的查找表。"""
+    mapping = DEFAULT_MAPPING if mapping is None else mapping
+    return np.array([mapping.get(info["outlook"], 0) for info in HEXAGRAMS], dtype=float)
+
+
+def forward_returns(closes, horizons=HORIZONS):
+    """(len(horizons), N) 的前瞻收益矩阵；末尾不足 h 根的位置为 NaN。"""
+    fwd = np.full((len(horizons), len(closes)), np.nan)
+    for k, h in enumerate(horizons):
+        fwd[k, :-h] = closes[h:] / closes[:-h] - 1
+    return fwd
+
+
+def hexagram_stats(codes, fwd, positions, horizons=HORIZONS):
+    """按卦统计：出现次数、各周期平均前瞻收益、上涨概率、信号命中率。"""
+    codes = np.asarray(codes, dtype=np.intp)
+    count = np.bincount(codes, minlength=64)
+    data = {
+        "name": [info["name"] for info in HEXAGRAMS],
+        "outlook": [info["outlook"] for info in HEXAGRAMS],
+        "count": count,
+    }
+    for k, h in enumerate(horizons):
+        valid = ~np.isnan(fwd[k])
+        ret = np.where(valid, fwd[k], 0.0)
+        n = np.bincount(codes, weights=valid, minlength=64)
+        active = valid & (positions != 0)
+        n_active = np.bincount(codes, weights=active, minlength=64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            data[f"mean_{h}d"] = np.bincount(codes, weights=ret, minlength=64) / n
+            data[f"up_{h}d"] = np.bincount(codes, weights=valid & (ret > 0), minlength=64) / n
+            data[f"hit_{h}d"] = np.bincount(codes, weights=active & (positions * ret > 0), minlength=64) / n_active
+    stats = pd.DataFrame(data)
+    stats.index.name = "code"
+    return stats[stats["count"] > 0].sort_values("count", ascending=False)
+
+
+def _summary(positions, fwd, horizons, strat):
+    equity = np.cumprod(1 + strat)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    active = positions != 0
+    std = strat.std() if len(strat) else 0.0
+    summary = {
+        "bars": len(positions),
+        "exposure": float(np.abs(positions).mean()) if len(positions) else 0.0,
+        "trades": int(np.count_nonzero(np.diff(positions))),
+        "total_return": float(equity[-1] - 1) if len(equity) else 0.0,
+        "annual_return": float(strat.mean() * PERIODS_PER_YEAR) if len(strat) else 0.0,
+        "sharpe": float(strat.mean() / std * np.sqrt(PERIODS_PER_YEAR)) if std > 0 else 0.0,
+        "max_drawdown": float(drawdown.min()) if len(drawdown) else 0.0,
+    }
+    for k, h in enumerate(horizons):
+        valid = active & ~np.isnan(fwd[k])
+        hits = positions[valid] * fwd[k][valid] > 0
+        summary[f"hit_{h}d"] = float(hits.mean()) if len(hits) else float("nan")
+    return summary, equity
+
+
+def _signals(opens, closes, table, signal, horizons, multiplier, lookback, method):
+    ends, lines = line_matrix(opens, closes, multiplier, lookback, method)
+    ben, zhi, _ = lines_to_codes(lines)
+    codes = ben if signal == "ben" else zhi
+    fwd = forward_returns(closes, horizons)[:, ends]
+    return ends, codes, table[codes], fwd
+
+
+def _ohlc(df):
+    return df["Open"].to_numpy(dtype=float).ravel(), df["Close"].to_numpy(dtype=float).ravel()
+
+
+def _run(index, codes, positions, fwd, horizons):
+    # t 收盘按信号持仓到 t+1 收盘；最后一根没有下一日收益
+    strat = np.nan_to_num(positions * fwd[0])
+    summary, equity = _summary(positions, fwd, horizons, strat)
+    by_hexagram = hexagram_stats(codes, fwd, positions, horizons)
+    return BacktestResult(summary, by_hexagram, pd.Series(equity, index=index, name="equity"))
+
+
+def backtest(df, mapping=None, signal="ben", horizons=HORIZONS, multiplier=1.5, lookback=DEFAULT_LOOKBACK,
+             method="mean"):
+    """单品种回测；signal 为 "ben"（本卦）或 "zhi"（之卦）。"""
+    horizons = tuple(sorted(set(horizons) | {1}))
+    ends, codes, positions, fwd = _signals(*_ohlc(df), outlook_table(mapping), signal, horizons,
+                                           multiplier, lookback, method)
+    return _run(df.index[ends], codes, positions, fwd, horizons)
+
+
+def evaluate(opens, closes, table, signal="ben", horizons=HORIZONS, multiplier=1.5, lookback=DEFAULT_LOOKBACK,
+             method="mean"):
+    """数组版回测，只返回汇总指标（参数扫描用，table 见 outlook_table）。"""
+    horizons = tuple(sorted(set(horizons) | {1}))
+    _, _, positions, fwd = _signals(opens, closes, table, signal, horizons, multiplier, lookback, method)
+    summary, _ = _summary(positions, fwd, horizons, np.nan_to_num(positions * fwd[0]))
+    return summary
+
+
+def _many(items, horizons):
+    # items: (symbol, 日期索引, 卦码, 仓位, 前瞻收益)
+    rows, equities = [], {}
+    all_codes, all_pos, all_fwd = [], [], []
+
+    for symbol, index, codes, positions, fwd in items:
+        result = _run(index, codes, positions, fwd, horizons)
+        rows.append({"symbol": symbol, **result.summary})
+        equities[symbol] = result.equity
+        all_codes.append(codes)
+        all_pos.append(positions)
+        all_fwd.append(fwd)
+
+    pooled = hexagram_stats(
+        np.concatenate(all_codes) if all_codes else np.empty(0, dtype=np.intp),
+        np.concatenate(all_fwd, axis=1) if all_fwd else np.empty((len(horizons), 0)),
+        np.concatenate(all_pos) if all_pos else np.empty(0),
+        horizons,
+    )
+    summary = pd.DataFrame(rows).set_index("symbol") if rows else pd.DataFrame(index=pd.Index([], name="symbol"))
+    return summary, pooled, equities
+
+
+def backtest_many(frames, mapping=None, signal="ben", horizons=HORIZONS, multiplier=1.5, lookback=DEFAULT_LOOKBACK,
+                  method="mean", start=None):
+    """多品种回测：返回 (每个品种一行的汇总表, 跨品种合并的按卦统计, {symbol: 净值曲线})。
+
+    给出 start 时 frames 应含 start 之前的预热K线（见 warmup_start），只统计 start 及之后的信号。
+    """
+    horizons = tuple(sorted(set(horizons) | {1}))
+    table = outlook_table(mapping)
+
+    def items():
+        for symbol, df in frames.items():
+            ends, codes, positions, fwd = _signals(*_ohlc(df), table, signal, horizons, multiplier, lookback, method)
+            index = df.index[ends]
+            if start is not None:
+                keep = index >= pd.Timestamp(start)
+                index, codes, positions, fwd = index[keep], codes[keep], positions[keep], fwd[:, keep]
+            yield symbol, index, codes, positions, fwd
+
+    return _many(items(), horizons)
+
+
+def backtest_archived(views, mapping=None, signal="ben", horizons=HORIZONS):
+    """直接用归档（gua.archive 的视图）回测：卦码与收盘价已落盘，不再重算卦象。
+
+    归档记录是连续K线上的滚动窗口，前瞻收益由相邻记录的收盘价得到；返回值同 backtest_many。
+    """
+    horizons = tuple(sorted(set(horizons) | {1}))
+    table = outlook_table(mapping)
+
+    def items():
+        for symbol, view in views.items():
+            codes = np.asarray(view.ben if signal == "ben" else view.zhi)
+            yield symbol, view.dates, codes, table[codes], forward_returns(np.asarray(view.close, dtype=float), horizons)
+
+    return _many(items(), horizons)
+
+
+def parse_mapping(text):
+    """"bullish=1,bearish=-1,neutral=0" -> dict。"""
+    mapping = dict(DEFAULT_MAPPING)
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        key, _, value = part.partition("=")
+        if key not in DEFAULT_MAPPING:
+            raise ValueError(f"未知的 outlook: {key}")
+        mapping[key] = float(value)
+    return mapping
@@ -0,0 +1,165 @@
+"""多品种批量起卦：并发拉取整张自选表，逐个品种隔离错误，汇总成一张表。"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from gua.core import calculate_hexagram, generate_ai_reading
+from gua.engine import WINDOW, line_matrix, lines_to_codes, resample_bounds
+from gua.hexagrams import HEXAGRAMS
+from gua.metrics import span
+from gua.store import BarStore
+
+WATCHLIST = {
+    "BZ=F": "🛢️ Brent Crude",
+    "NG=F": "🔥 Natural Gas",
+    "TTF=F": "🇪🇺 Dutch TTF",
+    "RB=F": "⛽ RBOB Gasoline",
+}
+LOOKBACK_DAYS = 40
+MAX_WORKERS = 8
+# 周期 -> (名称, 阈值取样跨度)；日线跨度与市场页一致
+TIMEFRAMES = {
+    "1d": ("日线", timedelta(days=LOOKBACK_DAYS)),
+    "1wk": ("周线", timedelta(weeks=26)),
+    "1mo": ("月线", timedelta(days=730)),
+}
+
+
+def reading_window(end_date, days=LOOKBACK_DAYS):
+    """市场页的取数区间 [end-days, end+1d)。"""
+    end_date = pd.Timestamp(end_date).normalize()
+    return end_date - timedelta(days=days), end_date + timedelta(days=1)
+
+
+def fetch_many(symbols, start, end, store=None, interval="1d", max_workers=MAX_WORKERS):
+    """在有界线程池中并发取数；返回 {symbol: DataFrame 或 Exception}。"""
+    store = store or BarStore()
+
+    def fetch(symbol):
+        try:
+            return store.get_bars(symbol, start, end, interval)
+        except Exception as e:
+            return e
+
+    symbols = list(dict.fromkeys(symbols))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as pool:
+        return dict(zip(symbols, pool.map(fetch, symbols)))
+
+
+def market_reading(symbol, end_date, store=None, days=LOOKBACK_DAYS):
+    """市场页单次起卦：返回 {ben, zhi, details, date}；数据不足返回 None。"""
+    start, end = reading_window(end_date, days)
+    df = (store or BarStore()).get_bars(symbol, start, end)
+    if len(df) < WINDOW:
+        return None
+    with span("compute", symbol):
+        ben, zhi, details = calculate_hexagram(df)
+    return {"ben": ben, "zhi": zhi, "details": details, "date": df.index[-1]}
+
+
+def _reading_row(symbol, date, open_, close, lines, with_text=False):
+    ben, zhi, moving = (int(v[0]) for v in lines_to_codes(lines[None, :]))
+    row = {
+        "symbol": symbol,
+        "date": pd.Timestamp(date).strftime('%Y-%m-%d'),
+        "close": float(close),
+        "change": float((close - open_) / open_),
+        "lines": ",".join(str(v) for v in lines),
+        "ben": ben,
+        "ben_name": HEXAGRAMS[ben]["name"],
+        "zhi": zhi,
+        "zhi_name": HEXAGRAMS[zhi]["name"],
+        "moving": bin(moving).count("1"),
+        "outlook": HEXAGRAMS[ben]["outlook"],
+    }
+    if with_text:
+        row["reading"] = generate_ai_reading(HEXAGRAMS[ben], HEXAGRAMS[zhi], ben != zhi)
+    return row
+
+
+def summarize(symbol, df):
+    """单个品种的当前卦象摘要（与 calculate_hexagram 同口径：阈值取整个窗口）。"""
+    if len(df) < WINDOW:
+        raise ValueError("数据不足 (Data Insufficient)")
+    opens = df["Open"].to_numpy(dtype=float).ravel()
+    closes = df["Close"].to_numpy(dtype=float).ravel()
+    _, lines = line_matrix(opens, closes)
+    return {**_reading_row(symbol, df.index[-1], opens[-1], closes[-1], lines[-1]), "error": None}
+
+
+def timeframe_readings(symbol, df, end_date=None, timeframes=TIMEFRAMES):
+    """由同一条日线一次算出多个周期的读数，每个周期一行（按 timeframe 索引）。
+
+    周/月K线只用分组下标从原数组取开盘/收盘，不重新下载、不复制整段数据；
+    最后一组可能是未走完的本周/本月。
+    """
+    dates = df.index.to_numpy(dtype="datetime64[ns]")
+    if not len(dates):
+        return pd.DataFrame([{"timeframe": timeframe, "label": label, "bars": 0, "error": "数据不足 (Data Insufficient)"}
+                             for timeframe, (label, _) in timeframes.items()]).set_index("timeframe")
+    opens = df["Open"].to_numpy(dtype=float).ravel()
+    closes = df["Close"].to_numpy(dtype=float).ravel()
+    end = pd.Timestamp(dates[-1] if end_date is None else end_date).normalize()
+
+    rows = []
+    for timeframe, (label, window) in timeframes.items():
+        starts, stops = resample_bounds(dates, timeframe)
+        # 以分组最后一根K线的日期判断是否落在跨度内
+        first = int(np.searchsorted(dates[stops - 1], np.datetime64(end - window, "ns")))
+        open_at, close_at = starts[first:], stops[first:] - 1
+        if len(close_at) < WINDOW:
+            rows.append({"timeframe": timeframe, "label": label, "bars": len(close_at),
+                         "error": "数据不足 (Data Insufficient)"})
+            continue
+        _, lines = line_matrix(opens[open_at], closes[close_at])
+        row = _reading_row(symbol, dates[close_at[-1]], opens[open_at[-1]], closes[close_at[-1]], lines[-1])
+        rows.append({"timeframe": timeframe, "label": label, "bars": len(close_at), **row, "error": None})
+    return pd.DataFrame(rows).set_index("timeframe")
+
+
+def multi_timeframe_reading(symbol, end_date, store=None, timeframes=TIMEFRAMES):
+    """多周期读数只取一次日线：跨度取最长周期，再多留一个月保证首组完整。"""
+    end_date = pd.Timestamp(end_date).normalize()
+    longest = max(window for _, window in timeframes.values())
+    start, end = end_date - longest - timedelta(days=31), reading_window(end_date)[1]
+    df = (store or BarStore()).get_bars(symbol, start, end)
+    with span("timeframes", symbol):
+        return timeframe_readings(symbol, df, end_date, timeframes)
+
+
+def iter_readings(symbol, df, start=None, end=None, days=LOOKBACK_DAYS, with_text=False):
+    """逐个交易日生成与市场页同口径的读数：每个 [start, end) 内的日期取其前 days 天的窗口起卦。"""
+    dates = df.index.to_numpy(dtype="datetime64[ns]")
+    opens = df["Open"].to_numpy(dtype=float).ravel()
+    closes = df["Close"].to_numpy(dtype=float).ravel()
+    lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), "ns")))
+    hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), "ns")))
+    reach = np.timedelta64(days, "D")
+
+    for i in range(lo, hi):
+        first = int(np.searchsorted(dates, dates[i] - reach))
+        if i + 1 - first < WINDOW:
+            continue
+        _, lines = line_matrix(opens[first:i + 1], closes[first:i + 1])
+        yield _reading_row(symbol, dates[i], opens[i], closes[i], lines[-1], with_text)
+
+
+def run_watchlist(symbols, end_date, store=None, max_workers=MAX_WORKERS, days=LOOKBACK_DAYS):
+    """一次调用算出整张自选表的卦象；某个品种失败只记录在 error 列，不影响其它品种。"""
+    start, end = reading_window(end_date, days)
+    frames = fetch_many(symbols, start, end, store, max_workers=max_workers)
+
+    rows = []
+    for symbol, df in frames.items():
+        try:
+            if isinstance(df, Exception):
+                raise df
+            rows.append(summarize(symbol, df))
+        except Exception as e:
+            rows.append({"symbol": symbol, "error": str(e)})
+
+    columns = ["symbol", "date", "close", "change", "lines", "ben", "ben_name", "zhi", "zhi_name", "moving", "outlook",
+               "error"]
+    return pd.DataFrame(rows, columns=columns)
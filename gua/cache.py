@@ -0,0 +1,109 @@
+"""进程内共享的读数缓存：TTL 过期 + 容量上限 LRU 淘汰 + 相同请求合并。
+
+同一个 key 同时只有一个线程在计算，其余线程等待它的结果；
+计算出错不写入缓存，异常原样抛给所有等待者。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 15 * 60
+DEFAULT_MAXSIZE = 256
+
+
+class _Pending:
+    """正在计算中的 key：等待者阻塞在 done 上。"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ReadingCache:
+    """线程安全的 TTL + LRU 缓存，带命中/未命中/合并计数。"""
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (过期时刻, value)
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _lookup(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires <= now:
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def get_or_compute(self, key, compute):
+        """命中则直接返回；否则由第一个请求者调用 compute()，并发的相同请求等待同一结果。"""
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+            if found:
+                self.hits += 1
+                return value
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = _Pending()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.coalesced += 1
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = compute()
+        except BaseException as e:
+            pending.error = e
+            raise
+        else:
+            with self._lock:
+                self._data[key] = (time.monotonic() + self.ttl, pending.value)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+            return pending.value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.done.set()
+
+    def invalidate(self, key=None):
+        """删除一个 key；不传则清空全部缓存（计数保留）。"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,77 @@
+"""三钱起卦的 NumPy 引擎：单次起卦与百万次级别的蒙特卡洛分布统计。
+
+每爻掷三枚钱，正面记 3、反面记 2，三者之和为 6/7/8/9，
+理论概率分别为 1/8、3/8、3/8、1/8；本卦/之卦均为 64 卦均匀分布。
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from gua.engine import WINDOW, lines_to_codes
+from gua.hexagrams import HEXAGRAMS
+
+LINE_VALUES = (6, 7, 8, 9)
+LINE_PROBS = (1 / 8, 3 / 8, 3 / 8, 1 / 8)
+# 0..7 的三位随机数 -> 正面个数 -> 爻值
+_POPCOUNT_LINE = np.array([6 + bin(i).count("1") for i in range(8)], dtype=np.uint8)
+CHUNK = 1_000_000
+# 起卦后服务端额外等待的秒数；默认 0，动画交给前端 CSS
+CAST_DELAY = float(os.environ.get("GUA_CAST_DELAY", "0"))
+
+CastStats = namedtuple("CastStats", ["n", "lines", "hexagrams", "transitions"])
+
+
+def make_rng(seed=None):
+    """可复现的随机数发生器；未给 seed 时读取环境变量 GUA_CAST_SEED（未设置则随机）。"""
+    if seed is None and os.environ.get("GUA_CAST_SEED"):
+        seed = int(os.environ["GUA_CAST_SEED"])
+    return np.random.default_rng(seed)
+
+
+def cast_lines(n=1, rng=None):
+    """n 次起卦的爻值矩阵 (n x 6)，列 0 为初爻。"""
+    rng = rng if rng is not None else make_rng()
+    return _POPCOUNT_LINE[rng.integers(0, 8, size=(n, WINDOW), dtype=np.uint8)]
+
+
+def cast(rng=None):
+    """单次起卦，返回 6 个爻值（初爻在前）。"""
+    return [int(v) for v in cast_lines(1, rng)[0]]
+
+
+def cast_stats(n, rng=None, chunk=CHUNK):
+    """n 次起卦的分布统计；分块计算，内存占用与 n 无关。"""
+    rng = rng if rng is not None else make_rng()
+    line_counts = np.zeros(10, dtype=np.int64)
+    pair_counts = np.zeros(64 * 64, dtype=np.int64)
+    for done in range(0, n, chunk):
+        lines = cast_lines(min(chunk, n - done), rng)
+        line_counts += np.bincount(lines.ravel(), minlength=10)
+        ben, zhi, _ = lines_to_codes(lines)
+        pair_counts += np.bincount(ben.astype(np.intp) * 64 + zhi, minlength=64 * 64)
+
+    transitions = pair_counts.reshape(64, 64)
+    total_lines = max(n * WINDOW, 1)
+    lines_df = pd.DataFrame({
+        "count": line_counts[list(LINE_VALUES)],
+        "freq": line_counts[list(LINE_VALUES)] / total_lines,
+        "expected": LINE_PROBS,
+    }, index=pd.Index(LINE_VALUES, name="line"))
+
+    total = max(n, 1)
+    hexagrams = pd.DataFrame({
+        "name": [info["name"] for info in HEXAGRAMS],
+        "ben_freq": transitions.sum(axis=1) / total,
+        "zhi_freq": transitions.sum(axis=0) / total,
+        "expected": 1 / 64,
+    })
+    hexagrams.index.name = "code"
+    return CastStats(n, lines_df, hexagrams, transitions)
+
+
+def transition_prob(ben_code, zhi_code):
+    """理论上某本卦变为某之卦的概率（给定本卦后）：每爻 1/4 成为动爻。"""
+    moving = bin(ben_code ^ zhi_code).count("1")
+    return (1 / 4) ** moving * (3 / 4) ** (WINDOW - moving)
@@ -0,0 +1,243 @@
+"""命令行入口：python -m gua <子命令> ...（重依赖在子命令内部才导入）。"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+
+def _parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d")
+
+
+def _lookback(text):
+    """阈值回看：整数为K线根数，"40D" 形式为日历天数。"""
+    return timedelta(days=int(text[:-1])) if text.upper().endswith("D") else int(text)
+
+
+def _load_frames(symbols, start, end, interval="1d"):
+    from gua.batch import fetch_many
+
+    frames = {}
+    for symbol, df in fetch_many(symbols, start, end, interval=interval).items():
+        if isinstance(df, Exception):
+            print(f"[{symbol}] Data Error: {df}", file=sys.stderr)
+        elif len(df) == 0:
+            print(f"[{symbol}] 无数据 (No Data)", file=sys.stderr)
+        else:
+            frames[symbol] = df
+    return frames
+
+
+def cmd_backtest(args):
+    from gua.backtest import DEFAULT_LOOKBACK, backtest_archived, backtest_many, parse_mapping, warmup_start
+
+    if args.archive:
+        # 按 --multiplier / --lookback 选取对应参数的归档文件
+        from gua.archive import Archive
+
+        archive = Archive(args.archive, multiplier=args.multiplier, lookback=args.lookback or DEFAULT_LOOKBACK)
+        views = {}
+        for symbol in args.symbols:
+            if not archive.exists(symbol):
+                print(f"[{symbol}] 归档不存在 (No Archive): {archive.path(symbol)}", file=sys.stderr)
+                continue
+            views[symbol] = archive.view(symbol, args.start, args.end + timedelta(days=1))
+        summary, by_hexagram, _ = backtest_archived(
+            views, mapping=parse_mapping(args.mapping), signal=args.signal, horizons=args.horizons
+        )
+    else:
+        # 与归档路径同口径：--start 为首个信号日，之前的K线只用于预热阈值
+        lookback = args.lookback or DEFAULT_LOOKBACK
+        frames = _load_frames(args.symbols, warmup_start(args.start, lookback), args.end + timedelta(days=1))
+        summary, by_hexagram, _ = backtest_many(
+            frames,
+            mapping=parse_mapping(args.mapping),
+            signal=args.signal,
+            horizons=args.horizons,
+            multiplier=args.multiplier,
+            lookback=lookback,
+            start=args.start,
+        )
+    print(summary.to_string(float_format=lambda v: f"{v:.4f}"))
+    print()
+    print(by_hexagram.to_string(float_format=lambda v: f"{v:.4f}"))
+    if args.output:
+        summary.to_csv(args.output)
+    if args.by_hexagram:
+        by_hexagram.to_csv(args.by_hexagram)
+    return 0
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",")]
+
+
+def _ints(text):
+    return [int(v) for v in text.split(",")]
+
+
+def cmd_sweep(args):
+    from gua.backtest import parse_mapping
+    from gua.sweep import sweep
+
+    frames = _load_frames(args.symbols, args.start, args.end + timedelta(days=1))
+    if not frames:
+        print("没有可用的K线数据 (No Data)", file=sys.stderr)
+        return 2
+    ranked = sweep(
+        frames,
+        multipliers=args.multipliers,
+        lookbacks=args.lookbacks,
+        methods=args.methods.split(","),
+        mapping=parse_mapping(args.mapping),
+        signal=args.signal,
+        horizons=args.horizons,
+        max_workers=args.workers,
+        rank_by=args.rank_by,
+    )
+    print(ranked.head(args.top).to_string(float_format=lambda v: f"{v:.4f}"))
+    if args.output:
+        ranked.to_csv(args.output)
+    return 0
+
+
+def cmd_archive(args):
+    from gua.archive import Archive, archive_root
+
+    archive = Archive(args.root or archive_root(), multiplier=args.multiplier, lookback=args.lookback)
+    frames = _load_frames(args.symbols, args.start, args.end + timedelta(days=1), args.interval)
+    for symbol, df in frames.items():
+        added = archive.update(symbol, df, args.interval)
+        total = len(archive.view(symbol, interval=args.interval))
+        print(f"[{symbol}] +{added} 条，共 {total} 条 -> {archive.path(symbol, args.interval)}")
+    return 0
+
+
+def cmd_readings(args):
+    import csv
+    import json
+
+    from gua.batch import LOOKBACK_DAYS, iter_readings
+
+    end = args.end + timedelta(days=1)
+    frames = _load_frames(args.symbols, args.start - timedelta(days=LOOKBACK_DAYS), end)
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    writer = None
+    try:
+        for symbol, df in frames.items():
+            for row in iter_readings(symbol, df, args.start, end, with_text=args.with_reading):
+                if args.format == "jsonl":
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                else:
+                    if writer is None:
+                        writer = csv.DictWriter(out, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
+            # 每个品种写完即刷新，下游可以边读边处理
+            out.flush()
+    except BrokenPipeError:
+        # 下游（如 head）提前关闭管道：静默结束
+        sys.stdout = open(os.devnull, "w")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_scan(args):
+    from gua.universe import scan_universe, universe_symbols
+
+    symbols = list(dict.fromkeys(args.symbols + universe_symbols(args.universe.split(",") if args.universe else [])))
+    if not symbols:
+        print("请给出品种代码或 --universe", file=sys.stderr)
+        return 2
+    start = args.start or args.end - timedelta(days=200)
+    result = scan_universe(symbols, start, args.end + timedelta(days=1), days=args.days,
+                           lookback=args.lookback, threshold=args.threshold, max_workers=args.workers)
+    for symbol, error in result.errors.items():
+        print(f"[{symbol}] Data Error: {error}", file=sys.stderr)
+    print(result.current.to_string(float_format=lambda v: f"{v:.2f}"))
+    print()
+    print(result.current.groupby("ben_name").size().sort_values(ascending=False).to_string())
+    if args.output:
+        result.current.to_csv(args.output)
+    if args.matrix:
+        result.distance.to_csv(args.matrix)
+    return 0
+
+
+def build_parser():
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    parser = argparse.ArgumentParser(prog="gua", description="能源·周易量化 命令行工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("backtest", help="卦象 outlook 信号回测")
+    p.add_argument("symbols", nargs="+", help="品种代码，如 BZ=F NG=F")
+    p.add_argument("--start", type=_parse_date, default=today - timedelta(days=365 * 5),
+                   help="首个信号日 YYYY-MM-DD（之前的K线只用于预热阈值）")
+    p.add_argument("--end", type=_parse_date, default=today, help="结束日期 YYYY-MM-DD（含）")
+    p.add_argument("--signal", choices=["ben", "zhi"], default="ben", help="用本卦还是之卦产生信号")
+    p.add_argument("--mapping", default="", help='outlook -> 仓位，如 "bullish=1,bearish=-1,neutral=0"')
+    p.add_argument("--horizons", type=_ints, default=[1, 5, 20], help="前瞻收益周期（K线根数），如 1,5,20")
+    p.add_argument("--multiplier", type=float, default=1.5, help="动爻阈值倍数")
+    p.add_argument("--lookback", type=int, default=None, help="阈值均值的回看根数（默认 20）")
+    p.add_argument("--output", help="按品种汇总表写入 CSV")
+    p.add_argument("--by-hexagram", help="按卦统计写入 CSV")
+    p.add_argument("--archive", help="从归档目录读取卦码（见 archive 子命令），不再取数重算")
+    p.set_defaults(func=cmd_backtest)
+
+    p = sub.add_parser("archive", help="把滚动卦象追加写入内存映射归档")
+    p.add_argument("symbols", nargs="+", help="品种代码，如 BZ=F NG=F")
+    p.add_argument("--root", default=None, help="归档目录（默认 GUA_ARCHIVE 或 ~/.cache/gua/archive）")
+    p.add_argument("--start", type=_parse_date, default=datetime(2000, 1, 1), help="开始日期 YYYY-MM-DD")
+    p.add_argument("--end", type=_parse_date, default=today - timedelta(days=1), help="结束日期 YYYY-MM-DD（含，默认昨天：只归档已收盘K线）")
+    p.add_argument("--interval", default="1d", help="K线周期，如 1d / 1h")
+    p.add_argument("--multiplier", type=float, default=1.5, help="动爻阈值倍数")
+    p.add_argument("--lookback", type=_lookback, default=20,
+                   help="阈值回看：K线根数，或 40D 形式的日历天数（40D 即市场页历史同卦索引的口径）")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("sweep", help="阈值参数网格扫描（多进程）")
+    p.add_argument("symbols", nargs="+", help="品种代码，如 BZ=F NG=F")
+    p.add_argument("--start", type=_parse_date, default=today - timedelta(days=365 * 10), help="开始日期 YYYY-MM-DD")
+    p.add_argument("--end", type=_parse_date, default=today, help="结束日期 YYYY-MM-DD（含）")
+    p.add_argument("--multipliers", type=_floats, default=[1.0, 1.25, 1.5, 1.75, 2.0], help="阈值倍数，如 1,1.5,2")
+    p.add_argument("--lookbacks", type=_ints, default=[10, 20, 40, 60], help="阈值回看根数，如 10,20,40")
+    p.add_argument("--methods", default="mean,median,std", help="阈值定义：mean / median / std")
+    p.add_argument("--signal", choices=["ben", "zhi"], default="zhi", help="本卦与阈值无关，默认用之卦")
+    p.add_argument("--mapping", default="", help='outlook -> 仓位，如 "bullish=1,bearish=-1,neutral=0"')
+    p.add_argument("--horizons", type=_ints, default=[1, 5, 20], help="前瞻收益周期（K线根数）")
+    p.add_argument("--rank-by", default="sharpe", help="排序指标，如 sharpe / total_return / hit_5d")
+    p.add_argument("--workers", type=int, default=None, help="进程数（默认 CPU 核数）")
+    p.add_argument("--top", type=int, default=20, help="打印前 N 名")
+    p.add_argument("--output", help="完整排名写入 CSV")
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("scan", help="品种池横截面扫描：当前卦象 + Hamming 距离矩阵 + 聚类")
+    p.add_argument("symbols", nargs="*", help="品种代码，可与 --universe 合用")
+    p.add_argument("--universe", default="", help="品种池，逗号分隔：energy_futures,energy_equities,metals,agriculture,energy_etfs")
+    p.add_argument("--start", type=_parse_date, default=None, help="开始日期 YYYY-MM-DD（默认结束日期前 200 天）")
+    p.add_argument("--end", type=_parse_date, default=today, help="结束日期 YYYY-MM-DD（含）")
+    p.add_argument("--days", type=int, default=60, help="参与比较的最近窗口数")
+    p.add_argument("--lookback", type=int, default=20, help="阈值回看根数")
+    p.add_argument("--threshold", type=float, default=2.5, help="聚类的平均 Hamming 距离上限 (0~6)")
+    p.add_argument("--workers", type=int, default=16, help="并发取数线程数")
+    p.add_argument("--output", help="当前卦象表写入 CSV")
+    p.add_argument("--matrix", help="距离矩阵写入 CSV")
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("readings", help="逐日起卦，流式输出 CSV / JSONL")
+    p.add_argument("symbols", nargs="+", help="品种代码，如 BZ=F NG=F")
+    p.add_argument("--start", type=_parse_date, default=today - timedelta(days=30), help="开始日期 YYYY-MM-DD")
+    p.add_argument("--end", type=_parse_date, default=today, help="结束日期 YYYY-MM-DD（含）")
+    p.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="输出格式")
+    p.add_argument("--with-reading", action="store_true", help="附带 AI 解签文本")
+    p.add_argument("--output", help="写入文件（默认标准输出）")
+    p.set_defaults(func=cmd_readings)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
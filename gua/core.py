@@ -0,0 +1,71 @@
+"""计算核心：单次起卦与 AI 解签，只依赖标准库（不导入 Streamlit / yfinance / pandas）。"""
+import textwrap
+
+from gua.hexagrams import line_codes
+
+
+def calculate_hexagram(df):
+    # 确保是 Series, 避免 MultiIndex 导致的问题
+    try:
+        closes = df['Close'].values.flatten()
+        opens = df['Open'].values.flatten()
+    except:
+        closes = df['Close']
+        opens = df['Open']
+
+    changes = abs((closes - opens) / opens)
+    avg_change = changes.mean()
+    volatility_threshold = avg_change * 1.5
+
+    line_vals = []
+    details = []
+
+    # 取最后6天，保留自然顺序 (i=0 是最早日期 -> 初爻)
+    subset = df.tail(6)
+
+    for i in range(6):
+        row = subset.iloc[i]
+
+        # 强制标量化，防止 Series 歧义
+        c = float(row['Close'])
+        o = float(row['Open'])
+
+        is_up = c >= o
+        change_pct = abs((c - o) / o)
+        is_moving = change_pct > volatility_threshold
+
+        if is_up:
+            line_val = 9 if is_moving else 7
+        else:
+            line_val = 6 if is_moving else 8
+
+        line_vals.append(line_val)
+
+        details.append({
+            "date": row.name.strftime('%Y-%m-%d'),
+            "close": c,
+            "change": (c - o) / o,
+            "type": line_val,
+            "position": i
+        })
+
+    ben_code, zhi_code = line_codes(line_vals)
+    return ben_code, zhi_code, details
+
+
+def generate_ai_reading(ben_info, zhi_info, has_change, question=None):
+    """基于卦辞与走势给出简易 AI 解签（无外部依赖）。"""
+    trend_hint = {
+        "bullish": "多头力量占优，顺势而为。",
+        "bearish": "空头压制，需谨慎防守。",
+        "neutral": "震荡为主，宜轻仓试探。"
+    }.get(ben_info.get("outlook"), "保持平衡，随时应变。")
+
+    change_hint = "局势稳定，保持节奏。" if not has_change else f"正在向『{zhi_info['name']}』之象转化，提前布局。"
+
+    question_part = f"关于『{question}』，" if question else ""
+
+    return textwrap.dedent(f"""
+    {question_part}当前处于『{ben_info['name']}』之象：{ben_info['judgment']} {trend_hint}
+    {change_hint} 参考之卦的启示：{zhi_info['interp'].replace('<br>', '').strip()}
+    """).strip()
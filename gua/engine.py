@@ -0,0 +1,136 @@
+"""批量卦象引擎：一次 NumPy 计算完整历史上每个滚动 6 爻窗口的本卦/之卦。
+
+卦象编码见 gua.hexagrams（初爻为第 0 位，窗口中最早的一根K线即初爻）。
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from gua.hexagrams import TRANSITIONS
+
+WINDOW = 6
+BIT_WEIGHTS = (1 << np.arange(WINDOW)).astype(np.uint8)
+ZHI_TABLE = np.array(TRANSITIONS, dtype=np.uint8)
+THRESHOLD_METHODS = ("mean", "median", "std")
+TIMEFRAME_UNITS = {"1d": "D", "1wk": "W", "1mo": "M"}
+
+
+def _ohlc_arrays(df):
+    # 兼容未压平的 MultiIndex 列 (N x 1)
+    opens = df['Open'].to_numpy(dtype=float).ravel()
+    closes = df['Close'].to_numpy(dtype=float).ravel()
+    return opens, closes
+
+
+def volatility_threshold(returns, multiplier=1.5, lookback=None, method="mean", dates=None):
+    """每根K线处的动爻阈值。
+
+    returns 为 (close-open)/open；method 为 mean / median（|涨跌幅| 的均值/中位数）或 std（涨跌幅标准差）。
+    lookback=None 时用整段数据（mean 即 calculate_hexagram 的口径）；整数为截至当根的滚动 K 线根数；
+    timedelta 为按日历时间的滚动窗口 [t-lookback, t]（需给出 dates），与市场页取数区间同口径。
+    """
+    if method not in THRESHOLD_METHODS:
+        raise ValueError(f"未知的阈值定义: {method}")
+    values = returns if method == "std" else np.abs(returns)
+    if lookback is None:
+        stat = {"mean": np.mean, "median": np.median, "std": np.std}[method](values)
+        return np.full(len(values), stat * multiplier)
+    if isinstance(lookback, (int, np.integer)):
+        rolling = pd.Series(values).rolling(lookback, min_periods=lookback)
+    else:
+        if dates is None:
+            raise ValueError("按时间滚动的阈值需要 dates")
+        rolling = pd.Series(values, index=pd.DatetimeIndex(dates)).rolling(pd.Timedelta(lookback), closed="both")
+    stat = {"mean": rolling.mean, "median": rolling.median, "std": lambda: rolling.std(ddof=0)}[method]()
+    return stat.to_numpy() * multiplier
+
+
+def line_matrix(opens, closes, multiplier=1.5, lookback=None, method="mean", dates=None):
+    """数组版：返回 (各窗口末根K线在原序列中的位置, 爻值矩阵 M x 6)。"""
+    if len(closes) < WINDOW:
+        return np.empty(0, dtype=np.intp), np.empty((0, WINDOW), dtype=np.uint8)
+
+    returns = (closes - opens) / opens
+    changes = np.abs(returns)
+    threshold = volatility_threshold(returns, multiplier, lookback, method, dates)[WINDOW - 1:]
+
+    # 同一窗口内 6 根K线共用窗口末端的阈值
+    up = sliding_window_view(closes >= opens, WINDOW)
+    moving = sliding_window_view(changes, WINDOW) > threshold[:, None]
+    lines = np.where(up, np.where(moving, 9, 7), np.where(moving, 6, 8)).astype(np.uint8)
+
+    valid = ~np.isnan(threshold)
+    ends = np.arange(WINDOW - 1, len(closes))[valid]
+    return ends, lines[valid]
+
+
+def context_start(dates, first, lookback):
+    """计算以第 first 根及之后K线结束的窗口时，所需最早的K线位置（阈值回看 + 窗口本身）。"""
+    begin = max(0, first - WINDOW + 1)
+    if lookback is None:
+        return 0
+    if isinstance(lookback, (int, np.integer)):
+        return max(0, min(begin, first - lookback - WINDOW))
+    if first >= len(dates):
+        return begin
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    since = dates[first] - np.timedelta64(pd.Timedelta(lookback))
+    return min(begin, int(np.searchsorted(dates, since)))
+
+
+def panel_codes(opens, closes, multiplier=1.5, lookback=20):
+    """多品种同时计算：opens/closes 为 (品种数 N, K线数 L)、左侧可用 NaN 补齐的矩阵。
+
+    阈值为 |涨跌幅| 的滚动均值（lookback 根）；返回 (本卦, 之卦, 有效掩码)，形状均为 (N, L-5)，
+    第 j 列对应以第 j+5 根K线结束的窗口。
+    """
+    returns = (closes - opens) / opens
+    changes = np.abs(returns)
+    # 沿时间轴滚动：转置后逐列 rolling，一次覆盖所有品种
+    threshold = pd.DataFrame(changes.T).rolling(lookback, min_periods=lookback).mean().to_numpy().T * multiplier
+    threshold = threshold[:, WINDOW - 1:]
+
+    up = sliding_window_view(closes >= opens, WINDOW, axis=1)
+    moving = sliding_window_view(changes, WINDOW, axis=1) > threshold[..., None]
+    ben = (up @ BIT_WEIGHTS).astype(np.uint8)
+    mask = (moving @ BIT_WEIGHTS).astype(np.uint8)
+    valid = ~np.isnan(threshold) & ~np.isnan(sliding_window_view(changes, WINDOW, axis=1)).any(axis=-1)
+    return ben, ZHI_TABLE[ben, mask], valid
+
+
+def rolling_lines(df, multiplier=1.5, lookback=None, method="mean"):
+    """返回 (窗口结束日期, 爻值矩阵 M x 6)；爻值为 6/7/8/9，列 0 为初爻。"""
+    ends, lines = line_matrix(*_ohlc_arrays(df), multiplier, lookback, method, df.index)
+    return df.index[ends], lines
+
+
+def lines_to_codes(lines):
+    """爻值矩阵 -> (本卦, 之卦, 动爻掩码)，均为 uint8 编码。"""
+    ben = (np.isin(lines, (7, 9)) @ BIT_WEIGHTS).astype(np.uint8)
+    moving = (np.isin(lines, (6, 9)) @ BIT_WEIGHTS).astype(np.uint8)
+    return ben, ZHI_TABLE[ben, moving], moving
+
+
+def resample_bounds(dates, timeframe):
+    """按周期分组：返回各组在原序列中的 (起始位置, 结束位置+1)。只算下标，不复制价格数组。
+
+    周线从周一开始（numpy 的周以 1970-01-01 周四为界，先平移 3 天）。
+    """
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    if timeframe not in TIMEFRAME_UNITS:
+        raise ValueError(f"未知的周期: {timeframe}")
+    if timeframe == "1wk":
+        dates = dates + np.timedelta64(3, "D")
+    if not len(dates):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    keys = dates.astype(f"datetime64[{TIMEFRAME_UNITS[timeframe]}]")
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return starts, np.r_[starts[1:], len(keys)].astype(np.intp)
+
+
+def hexagram_series(df, multiplier=1.5, lookback=None, method="mean"):
+    """完整历史的卦象序列：按窗口结束日期索引，列为 ben / zhi / moving。"""
+    index, lines = rolling_lines(df, multiplier, lookback, method)
+    ben, zhi, moving = lines_to_codes(lines)
+    return pd.DataFrame({"ben": ben, "zhi": zhi, "moving": moving}, index=index)
+
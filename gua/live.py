@@ -0,0 +1,126 @@
+"""盘中实时模式：每根新K线 O(1) 更新读数，不再每次整段重下载、重算。
+
+动爻阈值与 calculate_hexagram 同口径（已见全部K线 |close-open|/open 的均值 × 倍数），
+用累计和/计数维护；最近 6 根K线放在环形缓冲里，阈值变化时只需重判这 6 爻。
+"""
+import threading
+from collections import deque
+from datetime import timedelta
+
+import pandas as pd
+
+from gua.engine import WINDOW
+from gua.hexagrams import line_codes
+from gua.store import BarStore, to_utc, utc_now
+
+INTERVALS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+}
+# 启动时回填的历史长度（yfinance 对 1m 只提供最近数日）
+SEED_HISTORY = {
+    "1m": timedelta(days=2),
+    "5m": timedelta(days=10),
+    "15m": timedelta(days=20),
+    "1h": timedelta(days=60),
+}
+REFRESH_SECONDS = 30
+
+
+class LiveHexagram:
+    """滚动读数：累计均值 + 6 格环形缓冲，push 一根K线为常数时间。"""
+
+    def __init__(self, multiplier=1.5):
+        self.multiplier = multiplier
+        self._sum = 0.0
+        self._count = 0
+        self._ring = deque(maxlen=WINDOW)  # (ts, open, close, change)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def last_ts(self):
+        return self._ring[-1][0] if self._ring else None
+
+    def push(self, ts, open_, close):
+        """并入一根K线；与最后一根同一时间戳视为未收盘K线的修订。返回是否被采纳。"""
+        last = self.last_ts
+        if last is not None and ts < last:
+            return False
+        if last is not None and ts == last:
+            self._sum -= abs(self._ring.pop()[3])
+            self._count -= 1
+        change = (close - open_) / open_
+        self._sum += abs(change)
+        self._count += 1
+        self._ring.append((ts, open_, close, change))
+        return True
+
+    @property
+    def threshold(self):
+        return self._sum / self._count * self.multiplier if self._count else 0.0
+
+    def lines(self):
+        """最近 6 根K线的爻值（初爻在前）；不足 6 根时返回 None。"""
+        if len(self._ring) < WINDOW:
+            return None
+        threshold = self.threshold
+        return [(9 if abs(chg) > threshold else 7) if close >= open_ else (6 if abs(chg) > threshold else 8)
+                for _, open_, close, chg in self._ring]
+
+    def reading(self):
+        """与 calculate_hexagram 相同的返回值 (ben_code, zhi_code, details)；不足 6 根时返回 None。"""
+        lines = self.lines()
+        if lines is None:
+            return None
+        details = [{
+            "date": pd.Timestamp(ts).strftime('%Y-%m-%d %H:%M'),
+            "close": close,
+            "change": chg,
+            "type": line_val,
+            "position": i,
+        } for i, ((ts, _, close, chg), line_val) in enumerate(zip(self._ring, lines))]
+        ben_code, zhi_code = line_codes(lines)
+        return ben_code, zhi_code, details
+
+
+class LiveFeed:
+    """单个 (品种, 周期) 的实时读数：每次 poll 只向仓库取最后一根K线及之后的部分。"""
+
+    def __init__(self, symbol, interval="5m", store=None, multiplier=1.5, refresh=REFRESH_SECONDS):
+        if interval not in INTERVALS:
+            raise ValueError(f"不支持的周期: {interval}")
+        self.symbol = symbol
+        self.interval = interval
+        self.store = store or BarStore()
+        self.refresh = timedelta(seconds=refresh)
+        self.hexagram = LiveHexagram(multiplier)
+        self.codes = None
+        self.version = 0  # 卦象每变化一次加一，界面据此决定是否重绘
+        self._lock = threading.Lock()
+
+    def poll(self, now=None):
+        """拉取新K线并逐根更新；返回本次并入的K线数。时间按 UTC（仓库中的K线时间为无时区的 UTC）。"""
+        with self._lock:
+            now = utc_now() if now is None else to_utc(now)
+            start = self.hexagram.last_ts
+            start = now - SEED_HISTORY[self.interval] if start is None else to_utc(start)
+            df = self.store.get_bars(self.symbol, start, now + INTERVALS[self.interval], self.interval,
+                                     max_age=self.refresh)
+            opens = df["Open"].to_numpy(dtype=float).ravel()
+            closes = df["Close"].to_numpy(dtype=float).ravel()
+            pushed = sum(self.hexagram.push(ts, o, c) for ts, o, c in zip(df.index, opens, closes))
+
+            reading = self.hexagram.reading()
+            codes = reading[:2] if reading else None
+            if codes != self.codes:
+                self.codes = codes
+                self.version += 1
+            return pushed
+
+    def reading(self):
+        with self._lock:
+            return self.hexagram.reading()
@@ -0,0 +1,196 @@
+"""运行指标：各阶段计时 span、按 (阶段, 品种) 的延迟直方图、缓存命中率。
+
+- span("download", symbol) 计时一个阶段，写入直方图，并记入当前 trace（调试面板用）；
+- 设置 GUA_METRICS_LOG=stderr 或文件路径后，每个 span 输出一行 JSON 日志；
+- 设置 GUA_METRICS_FILE 后，write_prometheus() 以 Prometheus 文本格式写出全部指标
+  （可交给 node_exporter 的 textfile collector 采集）。
+"""
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 秒；与 Prometheus 默认桶相近，上探到 10s 以覆盖慢速下载
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT = 1000
+
+logger = logging.getLogger("gua.metrics")
+_trace = contextvars.ContextVar("gua_trace", default=None)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        # 最近的原始样本，用于精确的 p50/p95/p99
+        self.recent = deque(maxlen=RECENT)
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class Metrics:
+    """进程内指标注册表（线程安全）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (stage, symbol) -> _Histogram
+        self._errors = {}  # (stage, error type) -> 次数
+        self._caches = {}  # 缓存名 -> 返回 {hits, misses, size, hit_rate, ...} 的函数
+
+    def observe(self, stage, seconds, symbol=""):
+        with self._lock:
+            self._histograms.setdefault((stage, symbol), _Histogram()).observe(seconds)
+
+    def error(self, stage, exc):
+        with self._lock:
+            key = (stage, type(exc).__name__)
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def register_cache(self, name, stats):
+        """登记一个缓存；导出时调用 stats()，每个数值字段导出为 gua_cache_<字段>{cache="name"}。"""
+        with self._lock:
+            self._caches[name] = stats
+
+    def cache_stats(self):
+        with self._lock:
+            caches = sorted(self._caches.items())
+        return {name: stats() for name, stats in caches}
+
+    def summary(self):
+        """每个 (阶段, 品种) 一行：次数、均值、p50/p95/p99、最大值（秒）。"""
+        with self._lock:
+            items = [(key, h.count, h.sum, sorted(h.recent)) for key, h in self._histograms.items()]
+        rows = []
+        for (stage, symbol), count, total, recent in sorted(items):
+            rows.append({
+                "stage": stage,
+                "symbol": symbol,
+                "count": count,
+                "mean": total / count if count else float("nan"),
+                "p50": _quantile(recent, 0.50),
+                "p95": _quantile(recent, 0.95),
+                "p99": _quantile(recent, 0.99),
+                "max": recent[-1] if recent else float("nan"),
+            })
+        return rows
+
+    def prometheus(self):
+        """Prometheus 文本格式。"""
+        with self._lock:
+            histograms = [(key, list(h.counts), h.sum, h.count) for key, h in sorted(self._histograms.items())]
+            errors = sorted(self._errors.items())
+
+        out = [
+            "# HELP gua_stage_seconds 各阶段耗时",
+            "# TYPE gua_stage_seconds histogram",
+        ]
+        for (stage, symbol), counts, total, count in histograms:
+            labels = f'stage="{stage}",symbol="{symbol}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append(f'gua_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            out.append(f"gua_stage_seconds_sum{{{labels}}} {total}")
+            out.append(f"gua_stage_seconds_count{{{labels}}} {count}")
+
+        out += ["# HELP gua_stage_errors_total 各阶段异常次数", "# TYPE gua_stage_errors_total counter"]
+        for (stage, error), n in errors:
+            out.append(f'gua_stage_errors_total{{stage="{stage}",error="{error}"}} {n}')
+
+        by_field = {}
+        for cache, stats in self.cache_stats().items():
+            for field, value in stats.items():
+                by_field.setdefault(field, []).append((cache, value))
+        for field, values in sorted(by_field.items()):
+            out.append(f"# TYPE gua_cache_{field} gauge")
+            out += [f'gua_cache_{field}{{cache="{cache}"}} {value}' for cache, value in values]
+        return "\n".join(out) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+
+
+METRICS = Metrics()
+
+
+@contextmanager
+def trace():
+    """收集 with 块内（同一线程/上下文）发生的所有 span，产出列表。"""
+    spans = []
+    token = _trace.set(spans)
+    try:
+        yield spans
+    finally:
+        _trace.reset(token)
+
+
+@contextmanager
+def span(stage, symbol="", **fields):
+    """计时一个阶段；异常会被记录（阶段、类型）后原样抛出。"""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        METRICS.observe(stage, seconds, symbol)
+        if error is not None:
+            METRICS.error(stage, error)
+        record = {"stage": stage, "symbol": symbol, "seconds": seconds, **fields,
+                  "error": f"{type(error).__name__}: {error}" if error is not None else None}
+        spans = _trace.get()
+        if spans is not None:
+            spans.append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"event": "span", "ts": time.time(), **record}, ensure_ascii=False, default=str))
+
+
+def failed_stage(spans):
+    """trace 中第一个出错的阶段名；都成功时返回 None。"""
+    return next((s["stage"] for s in spans if s["error"]), None)
+
+
+def write_prometheus(path=None):
+    """把当前指标写入 path（默认 GUA_METRICS_FILE）；先写临时文件再替换，避免采集到半个文件。"""
+    path = path or os.environ.get("GUA_METRICS_FILE")
+    if not path:
+        return None
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(METRICS.prometheus())
+    os.replace(tmp, path)
+    return path
+
+
+def configure_logging():
+    """按 GUA_METRICS_LOG 给 gua.metrics 挂一个输出 JSON 行的 handler（只挂一次）。"""
+    target = os.environ.get("GUA_METRICS_LOG")
+    if not target or logger.handlers:
+        return
+    handler = logging.StreamHandler() if target == "stderr" else logging.FileHandler(target, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
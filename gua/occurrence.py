@@ -0,0 +1,179 @@
+"""历史同卦倒排索引：本卦 / (本卦, 之卦) -> 出现日期，并附带各周期前瞻收益。
+
+新K线到来时只计算新增窗口、补齐旧记录尚未成熟的前瞻收益，不重建整个索引；
+阈值必须是滚动回看，增量结果才与整段重算一致。默认与市场页同口径：窗口末日之前
+LOOKBACK_DAYS 个日历日内全部K线的平均 |涨跌幅| × 倍数（整数 lookback 则按 K 线根数滚动）。
+"""
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from gua.backtest import HORIZONS
+from gua.batch import LOOKBACK_DAYS
+from gua.engine import context_start, line_matrix, lines_to_codes
+from gua.hexagrams import HEXAGRAMS
+
+HISTORY_YEARS = 10
+
+
+def history_start(end, years=HISTORY_YEARS):
+    """建索引所用历史的起点。"""
+    return pd.Timestamp(end) - pd.DateOffset(years=years)
+
+
+def _postings(keys, n):
+    """keys -> 每个取值的行号列表（行号递增）。"""
+    order = np.argsort(keys, kind="stable")
+    bounds = np.searchsorted(keys[order], np.arange(n + 1))
+    return [order[bounds[k]:bounds[k + 1]].tolist() for k in range(n)]
+
+
+class OccurrenceIndex:
+    """单个品种的卦象出现索引。"""
+
+    def __init__(self, symbol, horizons=HORIZONS, multiplier=1.5, lookback=timedelta(days=LOOKBACK_DAYS)):
+        if not lookback:
+            raise ValueError("增量索引需要滚动阈值 (lookback)")
+        self.symbol = symbol
+        self.horizons = tuple(horizons)
+        self.multiplier = multiplier
+        self.lookback = lookback
+        self._lock = threading.Lock()
+        # 原始K线（计算新窗口与前瞻收益需要）
+        self._dates = np.empty(0, dtype="datetime64[ns]")
+        self._opens = np.empty(0)
+        self._closes = np.empty(0)
+        # 每个已成窗口一行：窗口末根K线位置、本卦、之卦
+        self._ends = np.empty(0, dtype=np.intp)
+        self._ben = np.empty(0, dtype=np.uint8)
+        self._zhi = np.empty(0, dtype=np.uint8)
+        # 前瞻收益 (len(horizons) x 行数)，未成熟为 NaN
+        self._fwd = np.empty((len(self.horizons), 0))
+        # 倒排表：行号按时间递增
+        self._by_ben = [[] for _ in range(64)]
+        self._by_pair = {}
+
+    def __len__(self):
+        return len(self._ends)
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self._dates[-1]) if len(self._dates) else None
+
+    def _truncate_bars(self, n_bars):
+        """丢弃第 n_bars 根之后的K线及依赖它们的窗口（最后一根K线可能被修订）。"""
+        keep = int(np.searchsorted(self._ends, n_bars))
+        for row in range(len(self._ends) - 1, keep - 1, -1):
+            ben, zhi = int(self._ben[row]), int(self._zhi[row])
+            self._by_ben[ben].pop()
+            self._by_pair[(ben, zhi)].pop()
+        self._ends, self._ben, self._zhi = self._ends[:keep], self._ben[:keep], self._zhi[:keep]
+        self._fwd = self._fwd[:, :keep]
+        self._dates, self._opens, self._closes = self._dates[:n_bars], self._opens[:n_bars], self._closes[:n_bars]
+
+    def seed(self, view):
+        """从归档视图（gua.archive，阈值参数须一致）直接载入历史，之后再用 update 并入新K线。"""
+        from gua.archive import lookback_tag
+
+        meta = view.meta
+        if (meta["multiplier"], meta["lookback"], meta["method"]) != (self.multiplier, lookback_tag(self.lookback), "mean"):
+            raise ValueError(f"归档参数与索引不一致: {meta}")
+        with self._lock:
+            if len(self._dates):
+                raise ValueError("只能给空索引载入归档")
+            # 归档每根K线一条记录，窗口末根即该K线本身
+            self._dates = view.dates.to_numpy(dtype="datetime64[ns]")
+            self._opens = np.asarray(view.open, dtype=float)
+            self._closes = np.asarray(view.close, dtype=float)
+            self._ends = np.arange(len(view), dtype=np.intp)
+            self._ben, self._zhi = view.ben, view.zhi
+            self._fwd = self._forward_returns(self._ends)
+            self._by_ben = _postings(self._ben, 64)
+            pairs = _postings(self._ben.astype(np.intp) * 64 + self._zhi, 64 * 64)
+            self._by_pair = {divmod(key, 64): rows for key, rows in enumerate(pairs) if rows}
+            return len(view)
+
+    def update(self, df):
+        """并入新K线（df 可以是完整历史，只处理最后一根已知K线及之后的部分）；返回新增窗口数。"""
+        with self._lock:
+            dates = df.index.to_numpy(dtype="datetime64[ns]")
+            if len(self._dates):
+                start = int(np.searchsorted(dates, self._dates[-1]))
+                if start >= len(dates):
+                    return 0
+                self._truncate_bars(int(np.searchsorted(self._dates, dates[start])))
+                df, dates = df.iloc[start:], dates[start:]
+
+            n_old = len(self._dates)
+            self._dates = np.concatenate([self._dates, dates])
+            self._opens = np.concatenate([self._opens, df["Open"].to_numpy(dtype=float).ravel()])
+            self._closes = np.concatenate([self._closes, df["Close"].to_numpy(dtype=float).ravel()])
+
+            # 只在尾部足够计算新窗口阈值的范围内重算
+            offset = context_start(self._dates, n_old, self.lookback)
+            ends, lines = line_matrix(self._opens[offset:], self._closes[offset:], self.multiplier, self.lookback,
+                                      dates=self._dates[offset:])
+            ends = ends + offset
+            new = ends >= n_old
+            ends, lines = ends[new], lines[new]
+            ben, zhi, _ = lines_to_codes(lines)
+
+            first_row = len(self._ends)
+            for row, (b, z) in enumerate(zip(ben.tolist(), zhi.tolist()), start=first_row):
+                self._by_ben[b].append(row)
+                self._by_pair.setdefault((b, z), []).append(row)
+            self._ends = np.concatenate([self._ends, ends])
+            self._ben = np.concatenate([self._ben, ben])
+            self._zhi = np.concatenate([self._zhi, zhi])
+            self._fwd = np.concatenate([self._fwd, np.full((len(self.horizons), len(ends)), np.nan)], axis=1)
+
+            # 只重算末端可能被新K线“成熟”的行
+            pending = int(np.searchsorted(self._ends, n_old - max(self.horizons)))
+            self._fwd[:, pending:] = self._forward_returns(self._ends[pending:])
+            return len(ends)
+
+    def _forward_returns(self, ends):
+        out = np.full((len(self.horizons), len(ends)), np.nan)
+        for k, h in enumerate(self.horizons):
+            target = ends + h
+            ok = target < len(self._closes)
+            out[k, ok] = self._closes[target[ok]] / self._closes[ends[ok]] - 1
+        return out
+
+    def _fwd_columns(self, rows):
+        return {f"fwd_{h}d": self._fwd[k, rows] for k, h in enumerate(self.horizons)}
+
+    def _rows(self, ben, zhi=None, before=None):
+        postings = self._by_ben[ben] if zhi is None else self._by_pair.get((ben, zhi), [])
+        rows = np.array(postings, dtype=np.intp)
+        if before is not None and len(rows):
+            cutoff = np.datetime64(pd.Timestamp(before), "ns")
+            rows = rows[self._dates[self._ends[rows]] < cutoff]
+        return rows
+
+    def query(self, ben, zhi=None, before=None, limit=None):
+        """历次出现的明细（最近的在前）；before 当日及之后的出现被排除。"""
+        with self._lock:
+            rows = self._rows(ben, zhi, before)[::-1][:limit]
+            return pd.DataFrame({
+                "date": pd.DatetimeIndex(self._dates[self._ends[rows]]),
+                "ben": [HEXAGRAMS[c]["name"] for c in self._ben[rows]],
+                "zhi": [HEXAGRAMS[c]["name"] for c in self._zhi[rows]],
+                "close": self._closes[self._ends[rows]],
+                **self._fwd_columns(rows),
+            })
+
+    def stats(self, ben, zhi=None, before=None):
+        """汇总：出现次数、最近一次日期、各周期平均前瞻收益与上涨概率。"""
+        with self._lock:
+            rows = self._rows(ben, zhi, before)
+            fwd = self._fwd_columns(rows)
+            last = pd.Timestamp(self._dates[self._ends[rows[-1]]]) if len(rows) else None
+        result = {"count": len(rows), "last": last}
+        for key, ret in fwd.items():
+            valid = ret[~np.isnan(ret)]
+            result[f"mean_{key[4:]}"] = float(valid.mean()) if len(valid) else float("nan")
+            result[f"up_{key[4:]}"] = float((valid > 0).mean()) if len(valid) else float("nan")
+        return result
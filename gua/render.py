@@ -0,0 +1,160 @@
+"""HTML 渲染缓存：64 卦的线条 HTML 与本/之卦卡片只生成一次，每次请求只插入问题与价格行。"""
+import textwrap
+from functools import lru_cache
+
+from gua.hexagrams import HEXAGRAMS, code_to_bits
+
+_YANG = '<div class="line-yang"></div>'
+_YIN = '<div class="line-yin"><div class="line-yin-part"></div><div class="line-yin-part"></div></div>'
+# 问题文本的占位符；卡片缓存在此处切开，请求时拼接
+_QUESTION = "\x00question\x00"
+
+
+def _build_hexagram_html(code):
+    # 视觉显示 Top->Bottom (上->初)，所以需要 reversed；压缩成一行
+    html_lines = [_YANG if bit else _YIN for bit in reversed(code_to_bits(code))]
+    return f'<div class="hex-container">{"".join(html_lines)}</div>'
+
+
+HEXAGRAM_HTML = tuple(_build_hexagram_html(code) for code in range(64))
+
+
+def get_hexagram_html(code):
+    """卦象线条 HTML（导入时预生成）。"""
+    return HEXAGRAM_HTML[code]
+
+
+@lru_cache(maxsize=64)
+def ben_card_html(ben_code):
+    """市场页本卦卡片。"""
+    ben_info = HEXAGRAMS[ben_code]
+    ben_interp = ben_info['interp'].replace('\n', '')
+    return textwrap.dedent(f"""
+        <div class="result-card">
+            <div style="color:#64748b; font-weight:bold; font-size:12px; margin-bottom:5px;">CURRENT PHASE</div>
+            {HEXAGRAM_HTML[ben_code]}
+            <div style="font-size:24px; font-weight:bold; margin-top:10px;">{ben_info['name']}</div>
+            <div style="font-size:14px; font-style:italic; color:#64748b;">{ben_info['judgment']}</div>
+            <hr style="margin:10px 0; border-top: 1px solid #e2e8f0;">
+            <div style="text-align:left; font-size:13px; line-height:1.6;">
+                {ben_interp}
+            </div>
+        </div>
+    """).strip()
+
+
+@lru_cache(maxsize=128)
+def zhi_card_html(zhi_code, changed):
+    """市场页之卦卡片；无变爻时半透明显示。"""
+    zhi_info = HEXAGRAMS[zhi_code]
+    opacity = "1" if changed else "0.5"
+    suffix = "(变卦)" if changed else "(无变动)"
+    zhi_interp = zhi_info['interp'].replace('\n', '')
+    return textwrap.dedent(f"""
+        <div class="result-card" style="opacity:{opacity};">
+            <div style="color:#64748b; font-weight:bold; font-size:12px; margin-bottom:5px;">PROJECTION</div>
+            {HEXAGRAM_HTML[zhi_code]}
+            <div style="font-size:24px; font-weight:bold; margin-top:10px;">{zhi_info['name']} {suffix}</div>
+            <div style="font-size:14px; font-style:italic; color:#64748b;">{zhi_info['judgment']}</div>
+            <hr style="margin:10px 0; border-top: 1px solid #e2e8f0;">
+            <div style="text-align:left; font-size:13px; line-height:1.6;">
+                {zhi_interp}
+            </div>
+        </div>
+    """).strip()
+
+
+@lru_cache(maxsize=3 * 64 * 64)
+def timeframe_card_html(label, ben_code, zhi_code):
+    """多周期网格里的紧凑卡片：周期名 + 本卦线条 + 本卦→之卦。"""
+    ben_info = HEXAGRAMS[ben_code]
+    zhi_name = HEXAGRAMS[zhi_code]['name'] if zhi_code != ben_code else "—"
+    return textwrap.dedent(f"""
+        <div class="result-card" style="padding:15px;">
+            <div style="color:#64748b; font-weight:bold; font-size:12px; margin-bottom:5px;">{label}</div>
+            {HEXAGRAM_HTML[ben_code]}
+            <div style="font-size:18px; font-weight:bold; margin-top:8px;">{ben_info['name']} → {zhi_name}</div>
+            <div style="font-size:12px; color:#64748b;">{ben_info['outlook'].upper()}</div>
+        </div>
+    """).strip()
+
+
+@lru_cache(maxsize=64)
+def market_analysis_md(ben_code):
+    """市场页卦辞分析。"""
+    ben_info = HEXAGRAMS[ben_code]
+    return textwrap.dedent(f"""
+    - 本卦『{ben_info['name']}』：{ben_info['judgment']}<br>
+    - 象义解读：{ben_info['interp']}
+    - 趋势提示：{ben_info.get('outlook', 'neutral').upper()} 参考，守正兼顾顺势。
+    """).strip()
+
+
+@lru_cache(maxsize=64 * 64)
+def _daily_card_parts(ben_code, zhi_code):
+    d_ben = HEXAGRAMS[ben_code]
+    d_zhi = HEXAGRAMS[zhi_code]
+    d_ben_interp = d_ben['interp'].replace('\n', '')
+    html = textwrap.dedent(f"""
+    <div class="trad-card" style="background-color:#fffbf0; border:2px solid #b91c1c; border-radius:15px; padding:20px; margin-top:20px;">
+        <div style="text-align:center; margin-bottom:20px; color:#b91c1c; font-weight:bold; font-size:18px;">问：{_QUESTION}</div>
+
+        <div style="display:flex; justify-content:space-around; align-items:flex-start;">
+            <div style="text-align:center; flex:1;">
+                <div style="font-size:12px; color:#888; margin-bottom:8px;">本卦 (现状)</div>
+                {HEXAGRAM_HTML[ben_code]}
+                <div class="calligraphy" style="font-size:32px; margin-top:8px; color:#333;">{d_ben['name']}</div>
+                <div style="font-size:13px; color:#666;">{d_ben['judgment']}</div>
+            </div>
+
+            <div style="text-align:center; flex:1; opacity: {1.0 if ben_code != zhi_code else 0.3};">
+                <div style="font-size:12px; color:#888; margin-bottom:8px;">之卦 (变数)</div>
+                {HEXAGRAM_HTML[zhi_code]}
+                <div class="calligraphy" style="font-size:32px; margin-top:8px; color:#333;">{d_zhi['name']}</div>
+                <div style="font-size:13px; color:#666;">{d_zhi['judgment']}</div>
+            </div>
+        </div>
+
+        <hr style="border-color:#e5e7eb; margin:20px 0;">
+
+        <div style="background:rgba(255,255,255,0.6); padding:15px; border-radius:8px; border:1px dashed #d1d5db;">
+            <p style="font-weight:bold; color:#b91c1c; margin-bottom:5px;">💡 锦囊妙计：</p>
+            <div style="line-height:1.6; font-size:14px; color:#333;">
+                {d_ben_interp}
+            </div>
+            {f'<div style="margin-top:10px; font-size:13px; color:#d97706;">⚡ <strong>变爻启示：</strong>局势正在向 {d_zhi["name"]} 转变，请参考之卦建议。</div>' if ben_code != zhi_code else ''}
+        </div>
+    </div>
+    """).strip()
+    return tuple(html.split(_QUESTION))
+
+
+def daily_card_html(ben_code, zhi_code, question):
+    """问卜页结果卡片：缓存卡片主体，只插入问题文本。"""
+    head, tail = _daily_card_parts(ben_code, zhi_code)
+    return f"{head}{question}{tail}"
+
+
+@lru_cache(maxsize=64 * 64)
+def daily_analysis_md(ben_code, zhi_code):
+    """问卜页卦辞分析。"""
+    d_ben = HEXAGRAMS[ben_code]
+    d_zhi = HEXAGRAMS[zhi_code]
+    return textwrap.dedent(f"""
+    - 本卦『{d_ben['name']}』：{d_ben['judgment']}<br>
+    - 之卦『{d_zhi['name']}』：{d_zhi['judgment']}<br>
+    - 释义：{d_ben['interp']}
+    """)
+
+
+def cache_stats():
+    """全部渲染缓存的命中统计（合计）。"""
+    infos = [fn.cache_info() for fn in (ben_card_html, zhi_card_html, timeframe_card_html, market_analysis_md,
+                                        _daily_card_parts, daily_analysis_md)]
+    hits, misses = sum(i.hits for i in infos), sum(i.misses for i in infos)
+    return {
+        "size": sum(i.currsize for i in infos),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+    }
@@ -0,0 +1,254 @@
+"""本地 OHLCV 存储：按 (symbol, interval) 把K线落盘到 SQLite，只增量拉取缺失的部分。"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from gua.metrics import span
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+DAILY_INTERVALS = ("1d", "5d", "1wk", "1mo", "3mo")
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "gua", "bars.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+
+def normalize_bars(df):
+    """统一成 Open/High/Low/Close/Volume 列 + 无时区的 DatetimeIndex。"""
+    if df is None or len(df) == 0:
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+
+    # 处理 MultiIndex 列名 (yfinance v0.2+)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+
+    df = df[[c for c in COLUMNS if c in df.columns]].astype(float)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    df.index = index.rename("Date")
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+def to_utc(value):
+    """转成带时区的 UTC 时间戳；无时区的输入视为 UTC（与落盘口径一致）。"""
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def utc_now():
+    return pd.Timestamp(datetime.now(timezone.utc))
+
+
+def _to_ts(value):
+    return int(to_utc(value).timestamp())
+
+
+class YahooProvider:
+    """yfinance 数据源（延迟导入，批处理/离线场景无需安装）。"""
+
+    def fetch(self, symbol, start, end, interval="1d"):
+        import yfinance as yf
+        start, end = to_utc(start), to_utc(end)
+        if interval in DAILY_INTERVALS:
+            # 日线以日历日期为键：按日期（交易所本地）请求，首尾两天都不会因时差丢失
+            start, end = start.floor("D").tz_localize(None), end.ceil("D").tz_localize(None)
+        with span("download", symbol):
+            df = yf.download(symbol, start=start, end=end, interval=interval, progress=False)
+        with span("normalize", symbol):
+            return normalize_bars(df)
+
+
+class FileProvider:
+    """离线假数据源：从目录读取 <symbol>.csv 或 <symbol>_<interval>.csv。"""
+
+    def __init__(self, root):
+        self.root = root
+        self.calls = 0
+
+    def _path(self, symbol, interval):
+        name = f"{symbol}.csv" if interval == "1d" else f"{symbol}_{interval}.csv"
+        return os.path.join(self.root, name)
+
+    def fetch(self, symbol, start, end, interval="1d"):
+        self.calls += 1
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
+            return normalize_bars(None)
+        with span("download", symbol):
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+        with span("normalize", symbol):
+            df = normalize_bars(df)
+        start, end = to_utc(start).tz_localize(None), to_utc(end).tz_localize(None)
+        return df[(df.index >= start) & (df.index < end)]
+
+
+def provider_from_env():
+    """GUA_PROVIDER=file:<dir> 时使用离线数据源，否则用 yfinance。"""
+    spec = os.environ.get("GUA_PROVIDER", "yahoo")
+    if spec.startswith("file:"):
+        return FileProvider(spec[len("file:"):])
+    return YahooProvider()
+
+
+class BarStore:
+    """K线本地仓库：记录每个 (symbol, interval) 已覆盖的时间段，只补齐缺口。"""
+
+    def __init__(self, path=None, provider=None, max_age=timedelta(minutes=15)):
+        self.path = path or os.environ.get("GUA_STORE_PATH", DEFAULT_PATH)
+        self.provider = provider or provider_from_env()
+        # 截止到“现在”的区间在 max_age 内不重复拉取（盘中最后一根K线仍在变化）
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        # refresh 调用次数与其中真正访问上游的次数（命中率 = 无需访问上游的比例）
+        self.calls = 0
+        self.upstream_calls = 0
+        self._memory_lock = threading.RLock()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._memory_conn = sqlite3.connect(":memory:", check_same_thread=False) if self.path == ":memory:" else None
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        if self._memory_conn is not None:
+            # 内存库只有一个连接，多线程下需串行使用
+            with self._memory_lock, self._memory_conn:
+                yield self._memory_conn
+            return
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _coverage(self, conn, symbol, interval):
+        row = conn.execute(
+            "SELECT start_ts, end_ts FROM coverage WHERE symbol=? AND interval=?", (symbol, interval)
+        ).fetchone()
+        return row if row else (None, None)
+
+    def _write(self, conn, symbol, interval, df):
+        rows = [
+            (symbol, interval, _to_ts(ts), r.Open, r.High, r.Low, r.Close, r.Volume)
+            for ts, r in zip(df.index, df.reindex(columns=COLUMNS).itertuples(index=False))
+        ]
+        conn.executemany("INSERT OR REPLACE INTO bars VALUES (?,?,?,?,?,?,?,?)", rows)
+
+    def last_bar(self, symbol, interval="1d"):
+        """最近一根已落盘K线的时间；没有数据时返回 None。"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM bars WHERE symbol=? AND interval=?", (symbol, interval)
+            ).fetchone()
+        return pd.Timestamp(row[0], unit="s") if row and row[0] is not None else None
+
+    def _key_lock(self, symbol, interval):
+        # 每个 (symbol, interval) 一把锁：不同品种可并行拉取，同一品种不会重复拉取
+        with self._lock:
+            return self._key_locks.setdefault((symbol, interval), threading.Lock())
+
+    def refresh(self, symbol, start, end, interval="1d", max_age=None):
+        """保证 [start, end) 已在本地；返回本次向上游发起的请求次数（max_age 可按调用覆盖）。
+
+        时间一律按 UTC 处理并以带时区的形式交给数据源（yfinance 会把无时区时间当作交易所本地时间）。
+        上游返回空数据（yfinance 出错时不抛异常，只返回空表）时不扩大覆盖区间，下次会重试。
+        """
+        start, end = to_utc(start), to_utc(end)
+        start_ts = _to_ts(start)
+        now_ts = _to_ts(utc_now())
+        target_ts = min(_to_ts(end), now_ts)
+
+        with self._key_lock(symbol, interval), span("refresh", symbol):
+            with self._connect() as conn:
+                cov_start, cov_end = self._coverage(conn, symbol, interval)
+                last = conn.execute(
+                    "SELECT MAX(ts) FROM bars WHERE symbol=? AND interval=?", (symbol, interval)
+                ).fetchone()[0]
+
+            # 网络请求放在事务之外，避免长时间占用 SQLite 写锁
+            frames = []
+            if cov_start is None:
+                df = self.provider.fetch(symbol, start, end, interval)
+                frames.append(df)
+                if len(df):
+                    cov_start, cov_end = start_ts, target_ts
+            else:
+                # 头部缺口：查询更早的日期
+                if start_ts < cov_start:
+                    df = self.provider.fetch(symbol, start, pd.Timestamp(cov_start, unit="s", tz="UTC"), interval)
+                    frames.append(df)
+                    if len(df):
+                        cov_start = start_ts
+
+                # 尾部缺口：从最后一根K线开始重拉（它可能还没收盘）
+                max_age = self.max_age if max_age is None else max_age
+                tolerance = int(max_age.total_seconds()) if target_ts == now_ts else 0
+                if target_ts > cov_end + tolerance:
+                    tail_start = pd.Timestamp(min(last, cov_end) if last is not None else cov_end, unit="s", tz="UTC")
+                    df = self.provider.fetch(symbol, tail_start, end, interval)
+                    frames.append(df)
+                    if len(df):
+                        cov_end = target_ts
+
+            with self._connect() as conn:
+                for df in frames:
+                    self._write(conn, symbol, interval, df)
+                if cov_start is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO coverage VALUES (?,?,?,?)", (symbol, interval, cov_start, cov_end)
+                    )
+        with self._lock:
+            self.calls += 1
+            self.upstream_calls += bool(frames)
+        return len(frames)
+
+    def read(self, symbol, start, end, interval="1d"):
+        """只读本地数据，不访问上游。"""
+        with span("store_read", symbol), self._connect() as conn:
+            rows = conn.execute(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE symbol=? AND interval=? AND ts>=? AND ts<? ORDER BY ts",
+                (symbol, interval, _to_ts(start), _to_ts(end)),
+            ).fetchall()
+        if not rows:
+            return normalize_bars(None)
+        df = pd.DataFrame(rows, columns=["ts"] + COLUMNS)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts"), unit="s"), name="Date")
+        return df
+
+    def stats(self):
+        with self._lock:
+            calls, upstream = self.calls, self.upstream_calls
+        return {
+            "hits": calls - upstream,
+            "misses": upstream,
+            "hit_rate": (calls - upstream) / calls if calls else 0.0,
+        }
+
+    def get_bars(self, symbol, start, end, interval="1d", max_age=None):
+        """取 [start, end) 的K线：先补齐本地缺口，再从本地读取。"""
+        self.refresh(symbol, start, end, interval, max_age)
+        return self.read(symbol, start, end, interval)
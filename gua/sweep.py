@@ -0,0 +1,119 @@
+"""参数扫描：倍数 × 回看长度 × 阈值定义 的网格，用进程池铺满所有核。
+
+价格数组只在主进程写入一次共享内存 (multiprocessing.shared_memory)，
+子进程以只读视图挂载，任务本身只传递参数组合。
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from gua.backtest import DEFAULT_LOOKBACK, HORIZONS, evaluate, outlook_table
+from gua.engine import THRESHOLD_METHODS, WINDOW
+
+MULTIPLIERS = (1.0, 1.25, 1.5, 1.75, 2.0)
+LOOKBACKS = (10, DEFAULT_LOOKBACK, 40, 60)
+RANK_BY = "sharpe"
+
+# 子进程内挂载的共享价格数据：{symbol: (opens, closes)}
+_SHARED = {}
+_SHM = None
+
+
+def _pack(frames):
+    """把各品种的 Open/Close 排进一块共享内存；返回 (SharedMemory, 布局)。"""
+    layout, offset = [], 0
+    for symbol, df in frames.items():
+        layout.append((symbol, offset, len(df)))
+        offset += 2 * len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1) * 8)
+    buf = np.ndarray((offset,), dtype=np.float64, buffer=shm.buf)
+    for (symbol, start, n), df in zip(layout, frames.values()):
+        buf[start:start + n] = df["Open"].to_numpy(dtype=float).ravel()
+        buf[start + n:start + 2 * n] = df["Close"].to_numpy(dtype=float).ravel()
+    return shm, layout
+
+
+def _views(buf, layout):
+    views = {}
+    for symbol, start, n in layout:
+        opens, closes = buf[start:start + n], buf[start + n:start + 2 * n]
+        opens.flags.writeable = closes.flags.writeable = False
+        views[symbol] = (opens, closes)
+    return views
+
+
+def _attach(name, layout):
+    global _SHM
+    # 进程池子进程与主进程共用同一个 resource_tracker，只由主进程负责 unlink
+    _SHM = shared_memory.SharedMemory(name=name)
+    total = sum(2 * n for _, _, n in layout)
+    _SHARED.update(_views(np.ndarray((total,), dtype=np.float64, buffer=_SHM.buf), layout))
+
+
+def _evaluate_params(task):
+    multiplier, lookback, method, table, signal, horizons = task
+    rows = []
+    for symbol, (opens, closes) in _SHARED.items():
+        # K线不足以形成一个完整阈值窗口的品种不参与该组参数（否则以 0 收益拉低平均）
+        if len(closes) < lookback + WINDOW:
+            continue
+        summary = evaluate(opens, closes, table, signal, horizons, multiplier, lookback, method)
+        rows.append({"symbol": symbol, **summary})
+    return {"multiplier": multiplier, "lookback": lookback, "method": method}, rows
+
+
+def _aggregate(params, rows):
+    if not rows:
+        return {**params, "symbols": 0}
+    df = pd.DataFrame(rows)
+    metrics = [c for c in df.columns if c not in ("symbol", "bars", "trades")]
+    return {**params, "symbols": len(df), **df[metrics].mean().to_dict()}
+
+
+def sweep(frames, multipliers=MULTIPLIERS, lookbacks=LOOKBACKS, methods=THRESHOLD_METHODS, mapping=None,
+          signal="zhi", horizons=HORIZONS, max_workers=None, rank_by=RANK_BY, detail=False):
+    """在进程池中评估整个参数网格，返回按 rank_by 排序的结果表（各品种指标取平均）。
+
+    默认用之卦信号：本卦只看涨跌方向，与阈值参数无关。
+    K线少于 lookback + 6 根的品种不计入该组参数的平均，symbols 列为实际参与的品种数。
+    detail=True 时额外返回每个 (参数, 品种) 一行的明细表。
+    """
+    frames = {k: v for k, v in frames.items() if len(v)}
+    if not frames:
+        ranked = pd.DataFrame(columns=["multiplier", "lookback", "method", "symbols"],
+                              index=pd.RangeIndex(1, 1, name="rank"))
+        return (ranked, pd.DataFrame()) if detail else ranked
+    table = outlook_table(mapping)
+    horizons = tuple(horizons)
+    tasks = [(m, lb, me, table, signal, horizons)
+             for m, lb, me in itertools.product(multipliers, lookbacks, methods)]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    shm, layout = _pack(frames)
+    try:
+        if max_workers == 1:
+            # 单核时直接在本进程挂载，省去进程启动开销
+            _SHARED.clear()
+            _SHARED.update(_views(np.ndarray((shm.size // 8,), dtype=np.float64, buffer=shm.buf), layout))
+            results = [_evaluate_params(t) for t in tasks]
+            _SHARED.clear()
+        else:
+            with ProcessPoolExecutor(max_workers, initializer=_attach, initargs=(shm.name, layout)) as pool:
+                chunksize = max(1, len(tasks) // (max_workers * 4))
+                results = list(pool.map(_evaluate_params, tasks, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    ranked = pd.DataFrame([_aggregate(params, rows) for params, rows in results])
+    if ranked["symbols"].any():
+        ranked = ranked.sort_values(rank_by, ascending=False, ignore_index=True)
+    ranked.index = pd.RangeIndex(1, len(ranked) + 1, name="rank")
+    if not detail:
+        return ranked
+    detail_rows = [{**params, **row} for params, rows in results for row in rows]
+    return ranked, pd.DataFrame(detail_rows)
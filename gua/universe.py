@@ -0,0 +1,168 @@
+"""横截面扫描：一次算出整个品种池的当前本卦/之卦，并按近期卦象序列两两比较、聚类。
+
+距离为 6 位卦码的 Hamming 距离（逐日取平均，0~6），只在双方都有有效读数的日子上计算；
+全部用矩阵乘法完成，不做逐对循环。卦码先按各品种自己的交易日历计算，再按窗口末日对齐到
+所有品种交易日的并集上：某品种休市或数据停更的日子记为无效，不会与别的日子错位比较。
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from gua.backtest import DEFAULT_LOOKBACK
+from gua.batch import fetch_many
+from gua.engine import WINDOW, panel_codes
+from gua.hexagrams import HEXAGRAMS, OUTLOOKS
+
+UNIVERSES = {
+    "energy_futures": ["CL=F", "BZ=F", "NG=F", "HO=F", "RB=F", "TTF=F"],
+    "energy_equities": ["XOM", "CVX", "COP", "EOG", "SLB", "OXY", "PSX", "MPC", "VLO", "HAL", "DVN", "HES",
+                        "BP", "SHEL", "TTE", "EQNR", "ENB", "KMI", "WMB", "OKE"],
+    "metals": ["GC=F", "SI=F", "HG=F", "PL=F", "PA=F", "ALI=F"],
+    "agriculture": ["ZC=F", "ZW=F", "ZS=F", "ZM=F", "ZL=F", "KC=F", "SB=F", "CC=F", "CT=F", "LE=F", "HE=F"],
+    "energy_etfs": ["XLE", "XOP", "OIH", "USO", "UNG", "BNO", "UGA", "AMLP"],
+}
+SEQUENCE_DAYS = 60
+# 平均 Hamming 距离低于该值的品种并入同一簇
+CLUSTER_DISTANCE = 2.5
+MAX_WORKERS = 16
+
+_BITS = (np.arange(64)[:, None] >> np.arange(WINDOW) & 1).astype(np.float32)  # 卦码 -> 6 位
+
+ScanResult = namedtuple("ScanResult", ["current", "distance", "agreement", "errors"])
+
+
+def universe_symbols(names):
+    """若干品种池名称 -> 去重后的代码列表。"""
+    symbols = []
+    for name in names:
+        if name not in UNIVERSES:
+            raise ValueError(f"未知的品种池: {name}")
+        symbols += UNIVERSES[name]
+    return list(dict.fromkeys(symbols))
+
+
+def _panel(frames, bars):
+    """各品种最近 bars 根K线右对齐成 (N, bars) 矩阵，历史不足的左侧补 NaN / NaT。"""
+    opens = np.full((len(frames), bars), np.nan)
+    closes = np.full((len(frames), bars), np.nan)
+    dates = np.full((len(frames), bars), np.datetime64("NaT"), dtype="datetime64[D]")
+    for i, df in enumerate(frames.values()):
+        tail = df.iloc[-bars:]
+        opens[i, bars - len(tail):] = tail["Open"].to_numpy(dtype=float).ravel()
+        closes[i, bars - len(tail):] = tail["Close"].to_numpy(dtype=float).ravel()
+        dates[i, bars - len(tail):] = tail.index.to_numpy(dtype="datetime64[D]")
+    return opens, closes, dates
+
+
+def align_codes(ben, zhi, valid, end_dates, days):
+    """(N, W) 按各自日历排列的卦码 -> 共同日期轴上最近 days 天的 (本卦, 之卦, 有效掩码, 日期)。"""
+    common = np.unique(end_dates[valid])[-days:] if days else end_dates[valid][:0]
+    out_ben = np.zeros((len(ben), len(common)), dtype=np.uint8)
+    out_zhi = np.zeros_like(out_ben)
+    out_valid = np.zeros(out_ben.shape, dtype=bool)
+    if not len(common):
+        return out_ben, out_zhi, out_valid, common
+    pos = np.searchsorted(common, end_dates).clip(max=len(common) - 1)
+    rows, cols = np.nonzero(valid & (common[pos] == end_dates))
+    out_ben[rows, pos[rows, cols]] = ben[rows, cols]
+    out_zhi[rows, pos[rows, cols]] = zhi[rows, cols]
+    out_valid[rows, pos[rows, cols]] = True
+    return out_ben, out_zhi, out_valid, common
+
+
+def hamming_matrix(codes, valid):
+    """(N, D) 卦码序列两两之间的平均 Hamming 距离 (N, N) 与共同有效天数。"""
+    v = valid.astype(np.float32)
+    bits = _BITS[codes] * v[..., None]  # (N, D, 6)，无效日全为 0
+    n, d = codes.shape
+    a = bits.reshape(n, d * WINDOW)
+    vv = np.repeat(v, WINDOW, axis=1)
+    # 双方都有效时 a xor b = a(1-b) + (1-a)b
+    diff = a @ (vv - a).T + (vv - a) @ a.T
+    common = v @ v.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return diff / common, common
+
+
+def outlook_agreement(codes, valid):
+    """两两之间 outlook 一致的天数占共同有效天数的比例 (N, N)。"""
+    outlook_index = np.array([OUTLOOKS.index(info["outlook"]) for info in HEXAGRAMS])
+    onehot = (outlook_index[codes][..., None] == np.arange(len(OUTLOOKS))) & valid[..., None]
+    flat = onehot.reshape(codes.shape[0], codes.shape[1] * len(OUTLOOKS)).astype(np.float32)
+    common = valid.astype(np.float32) @ valid.astype(np.float32).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (flat @ flat.T) / common
+
+
+def cluster(distance, threshold=CLUSTER_DISTANCE):
+    """平均链接层次聚类：簇间平均距离不超过 threshold 时合并；返回从 0 开始、按簇大小排序的标签。"""
+    n = len(distance)
+    dist = np.where(np.isnan(distance), np.inf, distance).astype(float)
+    np.fill_diagonal(dist, np.inf)
+    sizes = np.ones(n)
+    alive = np.ones(n, dtype=bool)
+    labels = np.arange(n)
+    while alive.sum() > 1:
+        masked = np.where(alive[:, None] & alive[None, :], dist, np.inf)
+        i, j = np.unravel_index(np.argmin(masked), masked.shape)
+        if masked[i, j] > threshold:
+            break
+        # 合并 j 进 i：新簇到其它簇的距离为按大小加权的平均
+        dist[i] = dist[j] = (dist[i] * sizes[i] + dist[j] * sizes[j]) / (sizes[i] + sizes[j])
+        dist[:, i] = dist[i]
+        dist[i, i] = np.inf
+        sizes[i] += sizes[j]
+        alive[j] = False
+        labels[labels == j] = i
+    # 重新编号：最大的簇为 0
+    order = pd.Series(labels).value_counts().index
+    return pd.Series(labels).map({old: new for new, old in enumerate(order)}).to_numpy()
+
+
+def scan(frames, days=SEQUENCE_DAYS, multiplier=1.5, lookback=DEFAULT_LOOKBACK, threshold=CLUSTER_DISTANCE):
+    """对 {symbol: DataFrame} 计算当前卦象、近 days 个交易日的 Hamming 距离矩阵、outlook 一致率与聚类。"""
+    frames = {k: v for k, v in frames.items() if len(v)}
+    symbols = list(frames)
+    bars = days + lookback + WINDOW - 2
+    opens, closes, dates = _panel(frames, bars)
+    ben, zhi, valid = panel_codes(opens, closes, multiplier, lookback)
+    # 当前读数：各品种自己的最后一根K线（停更的品种日期会落后，见 date 列）
+    ok = valid[:, -1] if len(symbols) else np.zeros(0, dtype=bool)
+    cur_ben, cur_zhi = ben[:, -1].astype(int), zhi[:, -1].astype(int)
+
+    seq_ben, _, seq_valid, _ = align_codes(ben, zhi, valid, dates[:, WINDOW - 1:], days)
+    distance, _ = hamming_matrix(seq_ben, seq_valid)
+    agreement = outlook_agreement(seq_ben, seq_valid)
+    labels = cluster(distance, threshold) if symbols else np.empty(0, dtype=int)
+
+    current = pd.DataFrame({
+        "date": pd.DatetimeIndex(dates[:, -1]),
+        "close": closes[:, -1],
+        "ben": np.where(ok, cur_ben, -1),
+        "ben_name": [HEXAGRAMS[b]["name"] if k else None for b, k in zip(cur_ben, ok)],
+        "zhi": np.where(ok, cur_zhi, -1),
+        "zhi_name": [HEXAGRAMS[z]["name"] if k else None for z, k in zip(cur_zhi, ok)],
+        "outlook": [HEXAGRAMS[b]["outlook"] if k else None for b, k in zip(cur_ben, ok)],
+        "cluster": labels,
+        "days": seq_valid.sum(axis=1),
+    }, index=pd.Index(symbols, name="symbol"))
+    return ScanResult(
+        current.sort_values(["cluster", "ben"]),
+        pd.DataFrame(distance, index=symbols, columns=symbols),
+        pd.DataFrame(agreement, index=symbols, columns=symbols),
+        {},
+    )
+
+
+def scan_universe(symbols, start, end, store=None, max_workers=MAX_WORKERS, **kwargs):
+    """批量取数后扫描；取数失败或无数据的品种记在 errors 里，不影响其它品种。"""
+    frames, errors = {}, {}
+    for symbol, df in fetch_many(symbols, start, end, store, max_workers=max_workers).items():
+        if isinstance(df, Exception):
+            errors[symbol] = str(df)
+        elif len(df) == 0:
+            errors[symbol] = "无数据 (No Data)"
+        else:
+            frames[symbol] = df
+    return scan(frames, **kwargs)._replace(errors=errors)
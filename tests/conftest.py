@@ -0,0 +1,20 @@
+"""测试夹具：benchmarks.fixtures 的固定种子日线（离线），以及 FileProvider 可读的数据目录。"""
+import pytest
+
+from benchmarks import fixtures
+
+
+@pytest.fixture
+def make_bars():
+    return fixtures.make_bars
+
+
+@pytest.fixture
+def bars():
+    return fixtures.make_bars(600, seed=1, start="2020-01-01")
+
+
+@pytest.fixture
+def data_dir(tmp_path, bars):
+    bars.to_csv(tmp_path / "BZ=F.csv")
+    return tmp_path
@@ -0,0 +1,70 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from gua.archive import HEADER_SIZE, RECORD, Archive, ArchiveWriter, open_view
+from gua.engine import hexagram_series, rolling_lines
+
+
+@pytest.mark.parametrize("lookback", [20, timedelta(days=40)])
+def test_append_and_reopen(tmp_path, bars, lookback):
+    archive = Archive(str(tmp_path), lookback=lookback)
+    added = [archive.update("BZ=F", bars.iloc[:stop]) for stop in (100, 101, 350, len(bars))]
+    assert archive.update("BZ=F", bars) == 0
+
+    expected = hexagram_series(bars, lookback=lookback)
+    assert sum(added) == len(expected)
+    view = Archive(str(tmp_path), lookback=lookback).view("BZ=F")
+    assert view.dates.equals(expected.index)
+    np.testing.assert_array_equal(view.ben, expected["ben"])
+    np.testing.assert_array_equal(view.zhi, expected["zhi"])
+    np.testing.assert_array_equal(view.moving, expected["moving"])
+    np.testing.assert_array_equal(view.lines, rolling_lines(bars, lookback=lookback)[1])
+    np.testing.assert_allclose(view.close, bars["Close"].loc[expected.index], rtol=1e-6)
+
+
+def test_parameters_are_part_of_the_file_name(tmp_path, bars):
+    Archive(str(tmp_path)).update("BZ=F", bars)
+    Archive(str(tmp_path), lookback=timedelta(days=40)).update("BZ=F", bars)
+    assert sorted(os.listdir(tmp_path)) == ["BZ=F_1d_x1.5_20_mean.gua", "BZ=F_1d_x1.5_40D_mean.gua"]
+    assert Archive(str(tmp_path)).symbols() == ["BZ=F"]
+    assert not Archive(str(tmp_path), multiplier=2).exists("BZ=F")
+
+
+def test_mismatched_parameters_are_rejected(tmp_path):
+    path = str(tmp_path / "x.gua")
+    ArchiveWriter(path, lookback=20)
+    with pytest.raises(ValueError):
+        ArchiveWriter(path, lookback=30)
+
+
+def test_out_of_order_append_is_rejected(tmp_path, bars):
+    writer = Archive(str(tmp_path)).writer("BZ=F")
+    writer.append_bars(bars)
+    with pytest.raises(ValueError):
+        writer.append([0], [1], [2], [1.0], [1.0])
+
+
+def test_partial_record_is_ignored_then_truncated(tmp_path, bars):
+    archive = Archive(str(tmp_path))
+    archive.update("BZ=F", bars.iloc[:300])
+    path = archive.path("BZ=F")
+    n = len(open_view(path))
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (RECORD.itemsize // 2))
+    assert len(open_view(path)) == n
+
+    archive.update("BZ=F", bars)
+    assert (os.path.getsize(path) - HEADER_SIZE) % RECORD.itemsize == 0
+    assert len(archive.view("BZ=F")) == len(hexagram_series(bars, lookback=20))
+
+
+def test_slice_by_date(tmp_path, bars):
+    archive = Archive(str(tmp_path))
+    archive.update("BZ=F", bars)
+    view = archive.view("BZ=F", start="2021-01-01", end="2021-02-01")
+    assert view.dates.min() >= np.datetime64("2021-01-01")
+    assert view.dates.max() < np.datetime64("2021-02-01")
+    assert len(view) == len(bars.loc["2021-01-01":"2021-01-31"])
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gua.archive import Archive
+from gua.backtest import (backtest, backtest_archived, backtest_many, outlook_table, parse_mapping,
+                          warmup_start)
+from gua.engine import hexagram_series
+
+
+def _loop(df, signal="ben", lookback=20):
+    # 逐根K线：t 收盘按信号持仓，到 t+1 收盘结算
+    series = hexagram_series(df, lookback=lookback)
+    table = outlook_table()
+    closes = df["Close"]
+    equity, peak, drawdown, hits, active = 1.0, 1.0, 0.0, 0, 0
+    for date, code in zip(series.index, series[signal]):
+        i = closes.index.get_loc(date)
+        if i + 1 >= len(closes):
+            break
+        position, ret = table[code], closes.iloc[i + 1] / closes.iloc[i] - 1
+        equity *= 1 + position * ret
+        peak = max(peak, equity)
+        drawdown = min(drawdown, equity / peak - 1)
+        if position:
+            active += 1
+            hits += position * ret > 0
+    return equity - 1, drawdown, hits / active
+
+
+@pytest.mark.parametrize("signal", ["ben", "zhi"])
+def test_backtest_matches_loop(bars, signal):
+    result = backtest(bars, signal=signal)
+    total_return, drawdown, hit = _loop(bars, signal)
+    assert result.summary["total_return"] == pytest.approx(total_return)
+    assert result.summary["max_drawdown"] == pytest.approx(drawdown)
+    assert result.summary["hit_1d"] == pytest.approx(hit)
+    assert result.summary["bars"] == len(bars) - 19
+    assert result.equity.index.equals(hexagram_series(bars, lookback=20).index)
+
+
+def test_hexagram_stats_counts(bars):
+    result = backtest(bars)
+    assert result.by_hexagram["count"].sum() == result.summary["bars"]
+    assert result.by_hexagram["count"].is_monotonic_decreasing
+    assert ((result.by_hexagram["up_1d"] >= 0) & (result.by_hexagram["up_1d"] <= 1)).all()
+
+
+def test_backtest_many_pools_symbols(bars, make_bars):
+    frames = {"A": bars, "B": make_bars(300, seed=2)}
+    summary, pooled, equities = backtest_many(frames, horizons=(5,))
+    assert list(summary.index) == ["A", "B"]
+    assert pooled["count"].sum() == summary["bars"].sum()
+    for symbol, df in frames.items():
+        single = backtest(df, horizons=(5,))
+        assert summary.loc[symbol, "total_return"] == pytest.approx(single.summary["total_return"])
+        assert equities[symbol].equals(single.equity)
+    assert "hit_1d" in summary and "hit_5d" in summary
+
+
+def test_parse_mapping():
+    assert parse_mapping("bullish=1, bearish=0") == {"bullish": 1.0, "bearish": 0.0, "neutral": 0}
+    with pytest.raises(ValueError):
+        parse_mapping("sideways=1")
+
+
+@pytest.mark.parametrize("signal", ["ben", "zhi"])
+def test_archived_matches_computed_from_start(tmp_path, make_bars, signal):
+    frames = {"A": make_bars(1500, seed=1), "B": make_bars(1200, seed=2)}
+    archive = Archive(str(tmp_path))
+    for symbol, df in frames.items():
+        archive.update(symbol, df)
+
+    start = pd.Timestamp("2015-06-01")
+    warm = {symbol: df.loc[warmup_start(start):] for symbol, df in frames.items()}
+    summary, pooled, equities = backtest_many(warm, signal=signal, start=start)
+    views = {symbol: archive.view(symbol, start) for symbol in frames}
+    a_summary, a_pooled, a_equities = backtest_archived(views, signal=signal)
+
+    # --start 是首个信号日：两条路径统计同样多的K线
+    assert (summary["bars"] == a_summary["bars"]).all()
+    assert equities["A"].index[0] == a_equities["A"].index[0] >= start
+    pd.testing.assert_frame_equal(summary, a_summary, rtol=1e-5, atol=1e-6)
+    pd.testing.assert_frame_equal(pooled, a_pooled, rtol=1e-4, atol=1e-6)
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from gua.batch import TIMEFRAMES, run_watchlist, timeframe_readings
+from gua.engine import hexagram_series
+from gua.store import BarStore, FileProvider
+
+
+class FailingProvider(FileProvider):
+    def fetch(self, symbol, start, end, interval="1d"):
+        if symbol == "ERR":
+            raise ConnectionError("上游超时")
+        return super().fetch(symbol, start, end, interval)
+
+
+@pytest.fixture
+def store(tmp_path, data_dir, bars):
+    bars.iloc[-3:].to_csv(data_dir / "SHORT.csv")
+    return BarStore(str(tmp_path / "bars.sqlite"), FailingProvider(str(data_dir)))
+
+
+def test_run_watchlist_isolates_errors(store, bars):
+    end = bars.index[-1]
+    table = run_watchlist(["BZ=F", "NOPE", "SHORT", "ERR"], end, store=store).set_index("symbol")
+    assert list(table.index) == ["BZ=F", "NOPE", "SHORT", "ERR"]
+
+    good = table.loc["BZ=F"]
+    expected = hexagram_series(bars.loc[end - pd.Timedelta(days=40):end]).iloc[-1]
+    assert pd.isna(good["error"])
+    assert (good["ben"], good["zhi"]) == (expected["ben"], expected["zhi"])
+    assert good["date"] == end.strftime("%Y-%m-%d")
+
+    assert table.loc["NOPE", "error"].startswith("数据不足")
+    assert table.loc["SHORT", "error"].startswith("数据不足")
+    assert "上游超时" in table.loc["ERR", "error"]
+    assert table.loc[["NOPE", "SHORT", "ERR"], "ben"].isna().all()
+
+
+def test_timeframe_readings(bars):
+    table = timeframe_readings("BZ=F", bars)
+    assert list(table.index) == list(TIMEFRAMES)
+    assert table["error"].isna().all()
+    daily = hexagram_series(bars.loc[bars.index[-1] - pd.Timedelta(days=40):]).iloc[-1]
+    assert (table.loc["1d", "ben"], table.loc["1d", "zhi"]) == (daily["ben"], daily["zhi"])
+    weekly = bars.resample("W-SUN").agg({"Open": "first", "Close": "last"})
+    weekly.index = bars.index.to_series().resample("W-SUN").last()  # 以每周最后一根K线的日期为准
+    weekly = weekly.loc[bars.index[-1] - TIMEFRAMES["1wk"][1]:]
+    assert table.loc["1wk", "bars"] == len(weekly)
+    assert table.loc["1wk", "ben"] == hexagram_series(weekly).iloc[-1]["ben"]
+
+
+def test_timeframe_readings_empty_frame(bars):
+    table = timeframe_readings("BZ=F", bars.iloc[:0])
+    assert list(table.index) == list(TIMEFRAMES)
+    assert (table["bars"] == 0).all()
+    assert table["error"].str.startswith("数据不足").all()
@@ -0,0 +1,102 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import gua.cache
+from gua.cache import ReadingCache
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.001)
+
+
+def _run_concurrently(cache, compute, n):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(cache.get_or_compute("key", compute))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_concurrent_requests_are_coalesced():
+    cache = ReadingCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    threads, results, errors = _run_concurrently(cache, compute, 8)
+    _wait_for(lambda: cache.coalesced == 7)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and not errors
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert cache.get_or_compute("key", compute) is results[0]
+    assert cache.stats()["hits"] == 1
+
+
+def test_errors_reach_all_waiters_and_are_not_cached():
+    cache = ReadingCache()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("上游错误")
+
+    threads, results, errors = _run_concurrently(cache, failing, 4)
+    _wait_for(lambda: cache.coalesced == 3)
+    release.set()
+    for t in threads:
+        t.join()
+    assert not results
+    assert len(errors) == 4 and all(isinstance(e, RuntimeError) for e in errors)
+    assert len(cache) == 0
+    assert cache.get_or_compute("key", lambda: 42) == 42
+
+
+def test_ttl_and_lru(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(gua.cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = ReadingCache(ttl=10, maxsize=2)
+    assert cache.get_or_compute("a", lambda: 1) == 1
+    now[0] = 9.9
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    now[0] = 10.0
+    assert cache.get_or_compute("a", lambda: 3) == 3
+
+    cache.get_or_compute("b", lambda: 4)
+    cache.get_or_compute("a", lambda: None)  # a 变为最近使用
+    cache.get_or_compute("c", lambda: 5)
+    assert cache.evictions == 1
+    assert cache.get_or_compute("b", lambda: 6) == 6
+
+
+def test_invalidate():
+    cache = ReadingCache()
+    cache.get_or_compute("a", lambda: 1)
+    cache.invalidate("a")
+    assert cache.get_or_compute("a", lambda: 2) == 2
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_owner_exception_propagates():
+    cache = ReadingCache()
+    with pytest.raises(ZeroDivisionError):
+        cache.get_or_compute("key", lambda: 1 / 0)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from gua.casting import LINE_PROBS, cast, cast_lines, cast_stats, make_rng, transition_prob
+
+
+def test_same_seed_same_cast():
+    assert cast(make_rng(42)) == cast(make_rng(42))
+    rng = make_rng(42)
+    assert [cast(rng) for _ in range(5)] != [cast(rng) for _ in range(5)]
+
+
+def test_seed_from_environment(monkeypatch):
+    monkeypatch.setenv("GUA_CAST_SEED", "7")
+    assert cast() == cast(make_rng(7))
+
+
+def test_line_frequencies():
+    stats = cast_stats(10 ** 6, make_rng(0), chunk=300_000)
+    np.testing.assert_allclose(stats.lines["freq"], LINE_PROBS, atol=1e-3)
+    assert stats.lines["count"].sum() == 6 * 10 ** 6
+    assert stats.transitions.sum() == stats.n == 10 ** 6
+    np.testing.assert_allclose(stats.hexagrams["ben_freq"], 1 / 64, atol=1e-3)
+    # 第 0 行：坤为本卦时各之卦的频率 ≈ 理论转移概率
+    observed = stats.transitions[0] / stats.transitions[0].sum()
+    expected = [transition_prob(0, zhi) for zhi in range(64)]
+    np.testing.assert_allclose(observed, expected, atol=5e-3)
+
+
+def test_chunking_does_not_change_result():
+    a = cast_stats(10_000, make_rng(3), chunk=10_000)
+    b = cast_stats(10_000, make_rng(3), chunk=3_000)
+    np.testing.assert_array_equal(a.transitions, b.transitions)
+    assert set(np.unique(cast_lines(1000, make_rng(1)))) == {6, 7, 8, 9}
+
+
+def test_zero_casts():
+    stats = cast_stats(0, make_rng(0))
+    assert stats.transitions.sum() == 0
+    assert (stats.lines["freq"] == 0).all()
+    assert (stats.hexagrams["ben_freq"] == 0).all()
+
+
+def test_transition_probabilities_sum_to_one():
+    assert sum(transition_prob(5, zhi) for zhi in range(64)) == pytest.approx(1)
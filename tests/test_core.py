@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+from gua.core import generate_ai_reading
+from gua.hexagrams import HEXAGRAMS
+
+
+def test_core_import_is_headless():
+    code = ("import sys; from gua import calculate_hexagram, generate_ai_reading; "
+            "print(sorted(m for m in ('pandas', 'numpy', 'streamlit', 'yfinance') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_generate_ai_reading():
+    text = generate_ai_reading(HEXAGRAMS[63], HEXAGRAMS[0], True, question="问财运")
+    assert HEXAGRAMS[63]["name"] in text and HEXAGRAMS[0]["name"] in text
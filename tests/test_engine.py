@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gua.core import calculate_hexagram
+from gua.engine import context_start, hexagram_series, line_matrix, resample_bounds, rolling_lines, volatility_threshold
+
+
+def test_hexagram_series_matches_calculate_hexagram(bars):
+    for n in (6, 7, 40, 250, len(bars)):
+        df = bars.iloc[:n]
+        ben, zhi, details = calculate_hexagram(df)
+        index, matrix = rolling_lines(df)
+        last = hexagram_series(df).iloc[-1]
+        assert matrix[-1].tolist() == [d["type"] for d in details]
+        assert (last["ben"], last["zhi"]) == (ben, zhi)
+        assert last.name == index[-1] == df.index[-1]
+
+
+def test_rolling_lookback_is_causal(bars):
+    full = hexagram_series(bars, lookback=20)
+    head = hexagram_series(bars.iloc[:300], lookback=20)
+    assert full.index[0] == bars.index[19]
+    assert full.loc[head.index].equals(head)
+
+
+def test_hexagram_series_short_input(bars):
+    assert hexagram_series(bars.iloc[:5]).empty
+
+
+def test_calendar_day_lookback(bars):
+    # timedelta 回看：阈值为 [t-40天, t] 内全部K线的平均 |涨跌幅|
+    changes = (bars["Close"] - bars["Open"]).abs() / bars["Open"]
+    threshold = volatility_threshold((bars["Close"] - bars["Open"]).to_numpy() / bars["Open"].to_numpy(),
+                                     lookback=timedelta(days=40), dates=bars.index)
+    for i in (0, 10, 300, len(bars) - 1):
+        date = bars.index[i]
+        assert threshold[i] == pytest.approx(changes.loc[date - timedelta(days=40):date].mean() * 1.5)
+    with pytest.raises(ValueError):
+        volatility_threshold(changes.to_numpy(), lookback=timedelta(days=40))
+
+
+def test_resample_bounds_groups_weeks_from_monday():
+    dates = pd.bdate_range("2024-01-03", periods=10)
+    starts, stops = resample_bounds(dates, "1wk")
+    assert starts.tolist() == [0, 3, 8]
+    assert stops.tolist() == [3, 8, 10]
+
+
+def test_resample_bounds_months(bars):
+    starts, stops = resample_bounds(bars.index, "1mo")
+    months = bars.index.to_period("M")
+    assert len(starts) == months.nunique()
+    assert (months[starts] == months[stops - 1]).all()
+
+
+def test_resample_bounds_empty():
+    starts, stops = resample_bounds(pd.DatetimeIndex([]), "1mo")
+    assert len(starts) == len(stops) == 0
+
+
+@pytest.mark.parametrize("lookback", [20, timedelta(days=40)])
+def test_context_start_gives_same_windows(bars, lookback):
+    opens, closes = bars["Open"].to_numpy(), bars["Close"].to_numpy()
+    full_ends, full_lines = line_matrix(opens, closes, lookback=lookback, dates=bars.index)
+    first = 300
+    begin = context_start(bars.index, first, lookback)
+    assert begin < first - 5
+    ends, lines = line_matrix(opens[begin:], closes[begin:], lookback=lookback, dates=bars.index[begin:])
+    ends = ends + begin
+    np.testing.assert_array_equal(ends[ends >= first], full_ends[full_ends >= first])
+    np.testing.assert_array_equal(lines[ends >= first], full_lines[full_ends >= first])
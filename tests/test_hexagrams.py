@@ -0,0 +1,32 @@
+import pytest
+
+from gua.hexagrams import HEXAGRAMS, TRANSITIONS, _ENTRIES, _build_table, code_to_key, key_to_code, line_codes
+
+
+def test_table_is_complete_and_unique():
+    assert len(HEXAGRAMS) == 64
+    assert [info["code"] for info in HEXAGRAMS] == list(range(64))
+    assert len({info["name"] for info in HEXAGRAMS}) == 64
+
+
+def test_cui_and_lv_have_their_own_codes():
+    # 萃（泽地）与旅（火山）曾因 dict 字面量的重复键互相覆盖
+    assert HEXAGRAMS[key_to_code("0,0,0,1,1,0")]["name"] == "萃"
+    assert HEXAGRAMS[key_to_code("0,0,1,1,0,1")]["name"] == "旅"
+
+
+def test_duplicate_key_is_rejected():
+    entries = _ENTRIES + ((_ENTRIES[0][0], dict(_ENTRIES[1][1])),)
+    with pytest.raises(ValueError, match="重复"):
+        _build_table(entries)
+
+
+def test_codes_round_trip():
+    assert all(key_to_code(code_to_key(code)) == code for code in range(64))
+
+
+def test_line_codes():
+    # 初爻老阳（动）、二爻老阴（动），其余静爻
+    ben, zhi = line_codes([9, 6, 7, 8, 7, 8])
+    assert ben == 0b010101
+    assert zhi == 0b010110 == TRANSITIONS[ben][0b000011]
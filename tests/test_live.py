@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from gua.core import calculate_hexagram
+from gua.live import LiveFeed, LiveHexagram
+from gua.store import BarStore, FileProvider
+
+
+def _expected(df):
+    ben, zhi, details = calculate_hexagram(df)
+    return ben, zhi, [d["type"] for d in details]
+
+
+def _actual(live):
+    ben, zhi, details = live.reading()
+    return ben, zhi, [d["type"] for d in details]
+
+
+def test_push_matches_calculate_hexagram(bars):
+    live = LiveHexagram()
+    for k, (ts, row) in enumerate(bars.iterrows(), start=1):
+        assert live.push(ts, row["Open"], row["Close"])
+        if k < 6:
+            assert live.reading() is None
+        elif k in (6, 7, 50, 333, len(bars)):
+            assert _actual(live) == _expected(bars.iloc[:k])
+    assert len(live) == len(bars)
+
+
+def test_revision_of_last_bar(bars):
+    live = LiveHexagram()
+    for ts, row in bars.iloc[:60].iterrows():
+        live.push(ts, row["Open"], row["Close"])
+    revised = bars.iloc[:60].copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] *= 1.2
+    assert live.push(revised.index[-1], revised["Open"].iloc[-1], revised["Close"].iloc[-1])
+    assert _actual(live) == _expected(revised)
+    # 更早的K线被忽略
+    assert not live.push(bars.index[0], 1.0, 2.0)
+    assert len(live) == 60
+
+
+def test_feed_polls_only_new_bars(tmp_path, bars):
+    intraday = bars.iloc[:300].copy()
+    intraday.index = pd.date_range("2024-01-02 00:00", periods=len(intraday), freq="5min", name="Date")
+    intraday.to_csv(tmp_path / "BZ=F_5m.csv")
+    store = BarStore(str(tmp_path / "bars.sqlite"), FileProvider(str(tmp_path)))
+    feed = LiveFeed("BZ=F", "5m", store=store, refresh=0)
+
+    # 带时区的 now 按 UTC 换算（北京时间 13:00 即 UTC 05:00）
+    assert feed.poll(now=pd.Timestamp("2024-01-02 13:00", tz="Asia/Shanghai")) == 61
+    # 之后只取最后一根（可能被修订）及新K线
+    assert feed.poll(now=pd.Timestamp("2024-01-02 10:00")) == 1 + 60
+    assert feed.hexagram.last_ts == pd.Timestamp("2024-01-02 10:00")
+    assert _actual(feed.hexagram) == _expected(intraday.iloc[:121])
+    assert feed.version >= 1
+
+
+def test_unsupported_interval():
+    with pytest.raises(ValueError):
+        LiveFeed("BZ=F", "1d", store=object())
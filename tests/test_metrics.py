@@ -0,0 +1,63 @@
+import re
+
+import pytest
+
+from gua.cache import ReadingCache
+from gua.metrics import BUCKETS, METRICS, Metrics, failed_stage, span, trace, write_prometheus
+
+
+def _buckets(text, labels):
+    pattern = re.compile(r'gua_stage_seconds_bucket\{' + re.escape(labels) + r',le="([^"]+)"\} (\d+)')
+    return [(le, int(n)) for le, n in pattern.findall(text)]
+
+
+def test_failing_span_is_recorded():
+    with trace() as spans:
+        with span("test_fetch", "BZ=F"):
+            pass
+        with pytest.raises(KeyError):
+            with span("test_compute", "BZ=F"):
+                raise KeyError("Close")
+        with span("test_render", "BZ=F"):
+            pass
+    assert [s["stage"] for s in spans] == ["test_fetch", "test_compute", "test_render"]
+    assert spans[0]["error"] is None
+    assert spans[1]["error"].startswith("KeyError")
+    assert failed_stage(spans) == "test_compute"
+    assert failed_stage(spans[:1]) is None
+    assert 'gua_stage_errors_total{stage="test_compute",error="KeyError"} 1' in METRICS.prometheus()
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    samples = (0.0005, 0.003, 0.003, 0.2, 3.0, 60.0)
+    for seconds in samples:
+        metrics.observe("download", seconds, "NG=F")
+    text = metrics.prometheus()
+    buckets = _buckets(text, 'stage="download",symbol="NG=F"')
+    assert [le for le, _ in buckets] == [repr(b) for b in BUCKETS] + ["+Inf"]
+    counts = [n for _, n in buckets]
+    assert counts == sorted(counts)
+    assert dict(buckets)["0.005"] == 3
+    assert dict(buckets)["5.0"] == 5
+    assert counts[-1] == len(samples)
+    assert f'gua_stage_seconds_count{{stage="download",symbol="NG=F"}} {len(samples)}' in text
+    assert metrics.summary()[0]["count"] == len(samples)
+
+
+def test_cache_stats_are_exported(tmp_path):
+    metrics = Metrics()
+    cache = ReadingCache()
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("a", lambda: 1)
+    metrics.register_cache("readings", cache.stats)
+    metrics.register_cache("cards", lambda: {"hits": 0, "misses": 4})
+    text = metrics.prometheus()
+    assert 'gua_cache_hits{cache="readings"} 1' in text
+    assert 'gua_cache_misses{cache="readings"} 1' in text
+    assert 'gua_cache_hit_rate{cache="readings"} 0.5' in text
+    assert 'gua_cache_misses{cache="cards"} 4' in text
+    assert text.count("# TYPE gua_cache_hits gauge") == 1
+
+    path = write_prometheus(str(tmp_path / "gua.prom"))
+    assert open(path, encoding="utf-8").read() == METRICS.prometheus()
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gua.archive import Archive
+from gua.engine import hexagram_series
+from gua.hexagrams import HEXAGRAMS
+from gua.occurrence import OccurrenceIndex
+
+
+def _queries(index):
+    return pd.concat([index.query(b) for b in range(64)], ignore_index=True)
+
+
+@pytest.mark.parametrize("lookback", [20, timedelta(days=40)])
+def test_incremental_equals_full(bars, lookback):
+    full = OccurrenceIndex("BZ=F", lookback=lookback)
+    full.update(bars)
+
+    inc = OccurrenceIndex("BZ=F", lookback=lookback)
+    for stop in (3, 30, 31, 200, 450, len(bars)):
+        inc.update(bars.iloc[:stop])
+    # 最后一根被修订后再补回原值
+    revised = bars.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] *= 1.1
+    inc.update(revised)
+    inc.update(bars)
+
+    assert len(inc) == len(full)
+    pd.testing.assert_frame_equal(_queries(inc), _queries(full))
+
+
+def test_default_threshold_matches_market_tab(bars):
+    # 市场页：截至当日 40 个日历日内的全部K线整体起卦
+    index = OccurrenceIndex("BZ=F")
+    index.update(bars)
+    readings = {}
+    for ben in range(64):
+        rows = index.query(ben)
+        readings.update(zip(rows["date"], zip(rows["ben"], rows["zhi"])))
+    assert len(readings) == len(index) == len(bars) - 5
+    for date in bars.index[5:]:
+        expected = hexagram_series(bars.loc[date - pd.Timedelta(days=40):date]).iloc[-1]
+        assert readings[date] == (HEXAGRAMS[expected["ben"]]["name"], HEXAGRAMS[expected["zhi"]]["name"])
+
+
+def test_stats_and_before(bars):
+    index = OccurrenceIndex("BZ=F", horizons=(1, 5), lookback=20)
+    index.update(bars)
+    ben = int(hexagram_series(bars, lookback=20)["ben"].mode()[0])
+    rows = index.query(ben)
+    stats = index.stats(ben)
+    assert stats["count"] == len(rows)
+    assert stats["last"] == rows["date"].iloc[0]
+    assert stats["mean_5d"] == pytest.approx(rows["fwd_5d"].mean())
+    assert index.stats(ben, before=rows["date"].iloc[0])["count"] == len(rows) - 1
+    closes = bars["Close"]
+    for date, fwd in zip(rows["date"], rows["fwd_1d"]):
+        i = closes.index.get_loc(date)
+        expected = closes.iloc[i + 1] / closes.iloc[i] - 1 if i + 1 < len(closes) else np.nan
+        assert fwd == pytest.approx(expected, nan_ok=True)
+
+
+def test_seed_from_archive(tmp_path, bars):
+    archive = Archive(str(tmp_path), lookback=timedelta(days=40))
+    archive.update("BZ=F", bars.iloc[:400])
+
+    seeded = OccurrenceIndex("BZ=F")
+    seeded.seed(archive.view("BZ=F"))
+    seeded.update(bars)
+    full = OccurrenceIndex("BZ=F")
+    full.update(bars)
+
+    # 归档的开/收盘价是 float32
+    pd.testing.assert_frame_equal(_queries(seeded), _queries(full), rtol=1e-5, atol=1e-6)
+    with pytest.raises(ValueError):
+        OccurrenceIndex("BZ=F", lookback=20).seed(archive.view("BZ=F"))
+    with pytest.raises(ValueError):
+        seeded.seed(archive.view("BZ=F"))
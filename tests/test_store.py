@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gua.store import BarStore, FileProvider, normalize_bars, to_utc
+
+
+class RecordingProvider(FileProvider):
+    """记录每次请求的区间；empty 次数内返回空表（模拟 yfinance 出错时的空结果）。"""
+
+    def __init__(self, root, empty=0):
+        super().__init__(root)
+        self.requests = []
+        self.empty = empty
+
+    def fetch(self, symbol, start, end, interval="1d"):
+        self.requests.append((pd.Timestamp(start), pd.Timestamp(end)))
+        if self.empty:
+            self.empty -= 1
+            return normalize_bars(None)
+        return super().fetch(symbol, start, end, interval)
+
+
+@pytest.fixture
+def store(tmp_path, data_dir):
+    return BarStore(str(tmp_path / "bars.sqlite"), RecordingProvider(str(data_dir)))
+
+
+def test_get_bars_matches_source(store, bars):
+    df = store.get_bars("BZ=F", "2020-03-01", "2020-09-01")
+    expected = bars.loc["2020-03-01":"2020-08-31"]
+    assert df.index.equals(expected.index.rename("Date"))
+    np.testing.assert_allclose(df["Close"].to_numpy(), expected["Close"].to_numpy())
+
+
+def test_refresh_only_fetches_gaps(store):
+    store.get_bars("BZ=F", "2020-03-01", "2020-09-01")
+    assert store.refresh("BZ=F", "2020-04-01", "2020-08-01") == 0
+
+    # 尾部缺口从最后一根已落盘K线开始，头部缺口截止到已覆盖的起点
+    assert store.refresh("BZ=F", "2020-01-01", "2020-12-01") == 2
+    (head_start, head_end), (tail_start, tail_end) = store.provider.requests[1:]
+    assert (head_start, head_end) == (to_utc("2020-01-01"), to_utc("2020-03-01"))
+    assert tail_start == to_utc(store.read("BZ=F", "2020-08-01", "2020-09-01").index[-1])
+    assert tail_end == to_utc("2020-12-01")
+    assert len(store.get_bars("BZ=F", "2020-01-01", "2020-12-01")) == len(pd.bdate_range("2020-01-01", "2020-11-30"))
+    assert len(store.provider.requests) == 3
+
+
+def test_empty_fetch_does_not_advance_coverage(tmp_path, data_dir):
+    store = BarStore(str(tmp_path / "bars.sqlite"), RecordingProvider(str(data_dir), empty=1))
+    assert store.get_bars("BZ=F", "2020-03-01", "2020-09-01").empty
+    # 上次是空结果：再次请求仍会访问上游，并拿到数据
+    assert len(store.get_bars("BZ=F", "2020-03-01", "2020-09-01")) > 0
+    assert len(store.provider.requests) == 2
+
+    store.provider.empty = 1
+    assert store.refresh("BZ=F", "2020-03-01", "2020-12-01") == 1
+    assert store.refresh("BZ=F", "2020-03-01", "2020-12-01") == 1
+    assert store.read("BZ=F", "2020-11-01", "2020-12-01").index[-1] == pd.Timestamp("2020-11-30")
+
+
+def test_times_are_utc(store):
+    naive = store.get_bars("BZ=F", datetime(2020, 3, 1), datetime(2020, 4, 1))
+    aware = store.get_bars("BZ=F", datetime(2020, 3, 1, tzinfo=timezone.utc),
+                           datetime(2020, 4, 1, 8, tzinfo=timezone(timedelta(hours=8))))
+    assert naive.index.equals(aware.index)
+    assert all(start.tzinfo is not None and end.tzinfo is not None for start, end in store.provider.requests)
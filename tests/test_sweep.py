@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from gua.sweep import sweep
+
+GRID = {"multipliers": (1.0, 1.5), "lookbacks": (10, 40), "methods": ("mean", "std")}
+
+
+@pytest.fixture
+def frames(bars, make_bars):
+    # SHORT 只够 lookback=10，不足 lookback=40
+    return {"A": bars, "B": make_bars(400, seed=2), "SHORT": make_bars(30, seed=3)}
+
+
+def test_process_pool_matches_single_process(frames):
+    single, detail = sweep(frames, max_workers=1, detail=True, **GRID)
+    pooled = sweep(frames, max_workers=2, **GRID)
+    pd.testing.assert_frame_equal(single, pooled)
+    assert len(single) == 8
+    assert single["sharpe"].is_monotonic_decreasing
+    assert len(detail) == 4 * 3 + 4 * 2
+
+
+def test_short_symbols_are_left_out(frames):
+    ranked = sweep(frames, max_workers=1, **GRID).set_index(["multiplier", "lookback", "method"])
+    assert (ranked.xs(10, level="lookback")["symbols"] == 3).all()
+    assert (ranked.xs(40, level="lookback")["symbols"] == 2).all()
+    without = sweep({k: v for k, v in frames.items() if k != "SHORT"}, max_workers=1, lookbacks=(40,),
+                    multipliers=(1.5,), methods=("mean",))
+    assert ranked.loc[(1.5, 40, "mean"), "total_return"] == pytest.approx(without["total_return"].iloc[0])
+
+
+def test_no_data(make_bars):
+    assert sweep({}, max_workers=1).empty
+    ranked = sweep({"SHORT": make_bars(30)}, max_workers=1, lookbacks=(40,))
+    assert (ranked["symbols"] == 0).all()
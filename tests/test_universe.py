@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from gua.engine import hexagram_series
+from gua.universe import align_codes, hamming_matrix, scan
+
+
+def _brute_force(codes, valid):
+    n = len(codes)
+    distance, common = np.full((n, n), np.nan), np.zeros((n, n))
+    for i in range(n):
+        for j in range(n):
+            both = valid[i] & valid[j]
+            common[i, j] = both.sum()
+            if common[i, j]:
+                distance[i, j] = sum(bin(a ^ b).count("1") for a, b in zip(codes[i][both], codes[j][both])) / common[i, j]
+    return distance, common
+
+
+def test_hamming_matrix_matches_brute_force():
+    rng = np.random.default_rng(7)
+    codes = rng.integers(0, 64, (6, 40)).astype(np.uint8)
+    valid = rng.random((6, 40)) > 0.2
+    valid[5] = False  # 没有共同有效日 -> NaN
+    distance, common = hamming_matrix(codes, valid)
+    expected, expected_common = _brute_force(codes, valid)
+    np.testing.assert_allclose(distance, expected, rtol=1e-6)
+    np.testing.assert_array_equal(common, expected_common)
+
+
+def test_align_codes_by_date():
+    dates = np.array([["2024-01-01", "2024-01-02", "2024-01-03"],
+                      ["2024-01-02", "2024-01-03", "2024-01-04"]], dtype="datetime64[D]")
+    ben = np.array([[1, 2, 3], [4, 5, 6]], dtype=np.uint8)
+    valid = np.ones(ben.shape, dtype=bool)
+    out_ben, _, out_valid, common = align_codes(ben, ben, valid, dates, 3)
+    assert common.astype(str).tolist() == ["2024-01-02", "2024-01-03", "2024-01-04"]
+    np.testing.assert_array_equal(out_ben, [[2, 3, 0], [4, 5, 6]])
+    np.testing.assert_array_equal(out_valid, [[True, True, False], [True, True, True]])
+
+
+def test_scan_compares_same_dates(make_bars):
+    a = make_bars(200, seed=1, start="2024-01-01")
+    # 同一条行情，b 少一个交易日、c 提前停更：同日卦码相同，距离应为 0
+    b = a.drop(a.index[150])
+    c = a.iloc[:-3]
+    result = scan({"A": a, "B": b, "C": c}, days=30)
+    assert np.nanmax(result.distance.loc[["A", "C"], ["A", "C"]].to_numpy()) == 0
+    assert result.current.loc["C", "date"] == c.index[-1]
+    assert result.current.loc["A", "ben"] == hexagram_series(a, lookback=20)["ben"].iloc[-1]
+    assert result.current.loc["C", "days"] == 27
+    assert set(result.current.index) == {"A", "B", "C"}
+    assert isinstance(result.distance, pd.DataFrame)